@@ -0,0 +1,18 @@
+"""muster's pricing path against the docs' reference resizer: python3 -m pytest scripts/"""
+import json, os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from workshop_results import load_core
+
+muster = load_core("muster")
+
+
+@pytest.mark.parametrize("tier", list(muster.TIERS))
+def test_resized_size_direct_matches_the_reference(tier):
+    # every size in 1000..3200 on both axes, where the ceilings bind, and a sweep to 9000
+    r = json.loads(muster.check_resized_size(tiers=[tier]))
+    assert r["ok"], r["mismatches"]
+    assert r["solved"] > 0.5 * r["checked"]      # mostly the solver, not the early "fits" return
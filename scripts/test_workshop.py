@@ -0,0 +1,33 @@
+"""The shared runtime, static/workshop/_lib/workshop.py: python3 -m pytest scripts/"""
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "static", "workshop", "_lib"))
+
+import workshop
+
+
+def work(x):
+    return sum(range(x))
+
+
+@pytest.mark.parametrize("other", [work, lambda x: sum(range(x))], ids=["same object", "same code"])
+def test_compare_never_ranks_a_function_against_itself(other):
+    for _ in range(3):
+        r = workshop.compare({"a": work, "b": other}, 50, budget_s=0.3)
+        slower = r["results"][r["order"][1]]
+        # unsettled, or settled as a tie: never a gap past the tie margin
+        assert not r["settled"] or slower["ci"][1] < 1 + 0.01, r
+
+
+def test_compare_ranks_a_real_gap():
+    r = workshop.compare({"slow": work, "fast": lambda x: x + 1}, 200, budget_s=1.0)
+    assert r["settled"] and r["order"] == ["fast", "slow"], r
+
+
+def test_compare_needs_a_round():
+    with pytest.raises(ValueError):
+        workshop.compare({"a": work}, 1, max_rounds=0)
+    r = workshop.compare({"a": work, "b": work}, 1, max_rounds=1)
+    assert r["stopped_by"] == "too few rounds" and r["results"]["a"]["ci"] == [None, None]
@@ -0,0 +1,14 @@
+"""The native bench's own plumbing: python3 -m pytest scripts/"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import workshop_bench
+
+
+def test_isolate_runs_a_model_that_does_not_import_workshop():
+    # muster never imports workshop.py, and _child once assumed every model did
+    report = workshop_bench.run(["muster.price_table"], isolate=True)
+    calls = report["models"]["muster"]["calls"]
+    assert calls and all(c["error"] is None for c in calls), calls
+    assert all(c["result"] for c in calls)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Run every floor model's measurements natively, in one command.
+
+Each static/workshop/*/core.py says the native bench imports it; this is that bench. It
+finds every core.py, loads it the way the page does (workshop.py from _lib beside it), and
+runs the calls the model lists in its BENCH — the same functions and defaults its page
+uses — collecting the JSON each returns. The point is the survey's numbers reproduced on
+your own hardware: a production-like box, no browser, no WebAssembly.
+
+    python3 scripts/workshop_bench.py                        # everything, a text summary
+    python3 scripts/workshop_bench.py --only compresso,cache-me.policies --markdown
+    python3 scripts/workshop_bench.py --budget-ms 500 --json > run.json
+    python3 scripts/workshop_bench.py --store                # keep it, 5 repeats: see workshop_results.py
+    python3 scripts/workshop_bench.py --isolate --warmup 2   # one fresh, pinned process per call
+
+A model whose libraries are not installed is reported and skipped, not fatal.
+
+In-process, every measurement inherits the last one's heap, its garbage, its imports and
+their side effects (hit_cost's diskcache temp dirs, a codec's thread pool). --isolate runs
+each call — each repeat — in a freshly spawned interpreter pinned to one core with
+os.sched_setaffinity, with workshop.GC_OFF set so timed batches run with the cyclic GC
+paused; --warmup untimed calls go first, and the result comes back over a pipe. That is
+what makes two runs of the same tree agree to within a few percent.
+"""
+import argparse, inspect, json, multiprocessing, os, sys, time, traceback
+
+from workshop_results import (STORE, environment, load_core, metrics, models, new_run_id, record,
+                              versions_of)
+
+
+def plan(only):
+    """[(model, [(fn, args, kwargs), ...] or an import error)] for the selected models."""
+    want = {}
+    for item in only or []:
+        model, _, fn = item.partition(".")
+        want.setdefault(model, set()).add(fn or None)
+    out = []
+    for model in models():
+        if want and model not in want:
+            continue
+        try:
+            mod = load_core(model)
+        except Exception as e:
+            out.append((model, None, f"{type(e).__name__}: {e}"))
+            continue
+        calls = [(fn, tuple(a), dict(kw)) for fn, a, kw in getattr(mod, "BENCH", [])]
+        fns = want.get(model)
+        if fns and None not in fns:
+            calls = [c for c in calls if c[0] in fns]
+        out.append((model, mod, calls))
+    unknown = sorted(set(want) - {m for m, _, _ in out})
+    if unknown:
+        sys.exit(f"no floor model called {', '.join(unknown)} (have: {', '.join(models())})")
+    return out
+
+
+def label(model, fn, args, kwargs):
+    inner = [repr(a) if not isinstance(a, list) or len(a) < 4 else f"[{len(a)} items]" for a in args]
+    inner += [f"{k}={v!r}" for k, v in kwargs.items()]
+    return f"{model}.{fn}({', '.join(inner)})"
+
+
+def pin_cpu(cpu=None):
+    """Pin this process to one core — `cpu`, or the last one it may run on (cpu 0 takes
+    most of the interrupts). None where the OS has no sched_setaffinity (macOS, Windows)."""
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cpu = max(os.sched_getaffinity(0)) if cpu is None else cpu
+    os.sched_setaffinity(0, {cpu})
+    return cpu
+
+
+def call(mod, fn, args, kwargs, warmup=0):
+    """warmup untimed calls, then one timed one: (result, error, seconds)."""
+    f = getattr(mod, fn)
+    try:
+        for _ in range(warmup): f(*args, **kwargs)
+        t0 = time.perf_counter(); out = f(*args, **kwargs); dt = time.perf_counter() - t0
+        return (json.loads(out) if isinstance(out, str) else out), None, dt
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=3).rstrip()}", 0.0
+
+
+def _child(conn, model, fn, args, kwargs, cpu, warmup):
+    """The isolated side: a fresh interpreter, one core, GC paused in timed batches."""
+    try:
+        cpu = pin_cpu(cpu)
+        mod = load_core(model)
+        import workshop                    # on the path now; not every model imports it
+        workshop.GC_OFF = True
+        if hasattr(mod, "init_samples"): mod.init_samples()
+        result, err, dt = call(mod, fn, args, kwargs, warmup)
+        conn.send((result, err, dt, {"cpu": cpu, "pid": os.getpid()}))
+    except BaseException as e:
+        conn.send((None, f"{type(e).__name__}: {e}", 0.0, {"cpu": None, "pid": os.getpid()}))
+    finally:
+        conn.close()
+
+
+def isolated(model, fn, args, kwargs, cpu=None, warmup=1):
+    """call() in a freshly spawned interpreter. Spawned, not forked: a fork would inherit
+    exactly the heap and imports isolation is for leaving behind."""
+    ctx = multiprocessing.get_context("spawn")
+    here, there = ctx.Pipe(duplex=False)
+    p = ctx.Process(target=_child, args=(there, model, fn, args, kwargs, cpu, warmup))
+    p.start(); there.close()
+    try:
+        result, err, dt, where = here.recv()
+    except EOFError:
+        result, err, dt, where = None, f"child exited with status {p.exitcode}", 0.0, {}
+    p.join()
+    return result, err, dt, where
+
+
+def run(only=None, budget_ms=None, repeat=1, store=None, progress=None, isolate=False, cpu=None,
+        warmup=None):
+    """Run the plan. Returns {"env", "run", "models": {model: {"versions", "error", "calls"}}}.
+    warmup defaults to 1 call isolated (a fresh process has cold caches) and 0 in-process."""
+    warmup = (1 if isolate else 0) if warmup is None else warmup
+    env = environment(); run_id = new_run_id(env)
+    env["isolation"] = ({"mode": "process", "cpu": cpu if cpu is not None else "last", "gc_off": True,
+                         "warmup": warmup} if isolate else {"mode": "in-process", "warmup": warmup})
+    report = {"env": env, "run": run_id, "models": {}}
+    for model, mod, calls in plan(only):
+        if mod is None:
+            report["models"][model] = {"versions": None, "error": calls, "calls": []}
+            if progress: progress(f"{model}: skipped — {calls}")
+            continue
+        init = getattr(mod, "init_samples", None)
+        if init and not isolate:
+            init()
+        vers = versions_of(mod)
+        entry = report["models"][model] = {"versions": vers, "error": None, "calls": []}
+        for fn, args, kwargs in calls:
+            f = getattr(mod, fn)
+            if budget_ms is not None and "budget_ms" in inspect.signature(f).parameters:
+                kwargs = {**kwargs, "budget_ms": budget_ms}
+            for i in range(repeat):
+                if isolate:
+                    result, err, dt, where = isolated(model, fn, args, kwargs, cpu, warmup)
+                else:
+                    (result, err, dt), where = call(mod, fn, args, kwargs, warmup), None
+                if err:
+                    err, _, tb = err.partition("\n")
+                    if progress and tb: progress(tb)
+                entry["calls"].append({"fn": fn, "args": list(args), "kwargs": kwargs, "repeat": i,
+                                       "seconds": dt, "result": result, "error": err, "where": where})
+                if store and err is None:
+                    record(store, run_id, model, fn, args, kwargs, result, env, vers, repeat=i)
+                if progress:
+                    progress(f"{label(model, fn, args, kwargs)}  {'FAILED ' + err if err else 'ok'}  {dt:.2f} s")
+    return report
+
+
+def markdown(report):
+    env = report["env"]
+    out = [f"# Workshop native bench — run {report['run']}", "",
+           f"Python {env['python']} ({env['implementation']}) · {env['cpu']} · {env['cores']} cores · "
+           f"{env['platform']} · git {env['git']}", ""]
+    for model, m in report["models"].items():
+        out += [f"## {model}", ""]
+        if m["error"]:
+            out += [f"Skipped: `{m['error']}`", ""]
+            continue
+        out += ["Versions: " + ", ".join(f"{k} {v}" for k, v in (m["versions"] or {}).items()), ""]
+        for c in m["calls"]:
+            out += [f"### `{label(model, c['fn'], c['args'], c['kwargs'])}`"
+                    + (f" (repeat {c['repeat']})" if c["repeat"] else ""), ""]
+            if c["error"]:
+                out += [f"Failed: `{c['error']}`", ""]
+                continue
+            out += ["| metric | value |", "|---|---:|"]
+            out += [f"| {p} | {v:.6g} |" for p, v in metrics(c["result"])]
+            out.append("")
+    return "\n".join(out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--only", action="append", default=[],
+                    help="model or model.fn, comma-separated or repeated (default: everything)")
+    ap.add_argument("--budget-ms", type=float, default=None,
+                    help="override every call's budget_ms (the pages' are 80-200 ms)")
+    ap.add_argument("--repeat", type=int, default=None,
+                    help="calls per function (default: 5 with --store, so a diff can judge it; else 1)")
+    ap.add_argument("--isolate", action="store_true",
+                    help="each call in a fresh process pinned to one core, GC paused in timed batches")
+    ap.add_argument("--cpu", type=int, default=None, help="the core --isolate pins to (default: the last)")
+    ap.add_argument("--warmup", type=int, default=None,
+                    help="untimed calls before the measured one (default: 1 with --isolate, else 0)")
+    ap.add_argument("--store", nargs="?", const=str(STORE), default=None,
+                    help="also append each result to the result store (default path: %(const)s)")
+    fmt = ap.add_mutually_exclusive_group()
+    fmt.add_argument("--json", action="store_true", help="the whole run as JSON on stdout")
+    fmt.add_argument("--markdown", action="store_true", help="the whole run as a Markdown report on stdout")
+    ap.add_argument("--list", action="store_true", help="print what would run, and stop")
+    o = ap.parse_args(argv)
+    only = [x for item in o.only for x in item.split(",") if x]
+    repeat = o.repeat if o.repeat is not None else (5 if o.store else 1)
+
+    if o.list:
+        for model, mod, calls in plan(only):
+            if mod is None:
+                print(f"{model}: cannot load — {calls}")
+            for fn, args, kwargs in calls if mod else []:
+                print(label(model, fn, args, kwargs))
+        return 0
+    quiet = o.json or o.markdown
+    log = (lambda s: print(s, file=sys.stderr)) if quiet else print
+    report = run(only, o.budget_ms, repeat, o.store, log, o.isolate, o.cpu, o.warmup)
+    if o.json:
+        print(json.dumps(report, indent=1))
+    elif o.markdown:
+        print(markdown(report))
+    failed = sum(1 for m in report["models"].values() for c in m["calls"] if c["error"])
+    skipped = sum(1 for m in report["models"].values() if m["error"])
+    log(f"run {report['run']}: {sum(len(m['calls']) for m in report['models'].values())} calls, "
+        f"{failed} failed, {skipped} model(s) skipped")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
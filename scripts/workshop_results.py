@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Keep every native bench measurement, and say when a hot path got slower.
+
+The floor-model functions (compresso.measure, cache-me.hit_cost, sorted-how.race,
+jsonic-rituals.measure, ...) return JSON that a page renders once and drops. Natively that
+JSON is worth keeping: zstandard, orjson and cachetools get upgraded, and the question after
+each upgrade is whether anything we lean on got slower. This appends each measurement to a
+JSONL store — one line per call, with the model's versions() payload, Python, the CPU, the
+git revision — and diffs two runs metric by metric.
+
+A run repeats each call (--repeat, default 5) so a difference has a spread to be judged
+against: two runs are compared per metric with a Mann-Whitney U test (exact for small
+samples), and a metric is a regression when it is worse by more than --threshold and the
+test says it is not noise at --alpha. Fewer than 5 a side can never get under alpha 0.01;
+diff says so ("too few samples") rather than calling the metric unchanged.
+
+    python3 scripts/workshop_results.py record compresso measure zstandard 3 json --repeat 5
+    python3 scripts/workshop_results.py runs
+    python3 scripts/workshop_results.py diff                 # the last two runs
+    python3 scripts/workshop_results.py diff 20260901-a1b2c3 latest --alpha 0.01
+
+The store is results/workshop-bench.jsonl under the repo unless --store says otherwise.
+"""
+import argparse, datetime, importlib.util, json, math, os, pathlib, platform, subprocess, sys
+
+REPO = pathlib.Path(__file__).resolve().parent.parent
+WORKSHOP = REPO / "static" / "workshop"
+STORE = REPO / "results" / "workshop-bench.jsonl"
+
+
+# ── what the numbers were measured on ────────────────────────────────────────
+
+def cpu_model():
+    try:
+        for line in open("/proc/cpuinfo", encoding="utf-8"):
+            if line.lower().startswith("model name"):
+                return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    if sys.platform == "darwin":
+        try:
+            return subprocess.run(["sysctl", "-n", "machdep.cpu.brand_string"], capture_output=True,
+                                  text=True, timeout=5).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            pass
+    return platform.processor() or platform.machine() or None
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(["git", "-C", str(REPO), "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "-C", str(REPO), "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return (rev + ("-dirty" if dirty else "")) or None
+
+
+def environment():
+    return {"python": sys.version.split()[0], "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "cpu": cpu_model(), "cores": os.cpu_count(), "git": git_revision()}
+
+
+def new_run_id(env):
+    return datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + "-" + (env.get("git") or "nogit").split("-")[0]
+
+
+# ── the floor models, loaded the way the native bench loads them ─────────────
+
+def models():
+    """Every floor model with a core.py, by directory name."""
+    return sorted(p.parent.name for p in WORKSHOP.glob("*/core.py"))
+
+
+def load_core(model):
+    """A model's core.py as a module of its own. Every model's file is called core.py,
+    so each is registered as "<model>.core" — the model's directory a namespace package,
+    with static/workshop on sys.path — which is a name the import system can find again:
+    a spawn or forkserver child unpickling one of its functions imports it by that name.
+    workshop.py comes from _lib, as on the page."""
+    for path in (str(WORKSHOP / "_lib"), str(WORKSHOP)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    name = model + ".core"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, WORKSHOP / model / "core.py")
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    here = str(WORKSHOP / model)
+    sys.path.insert(0, here)               # a model may import its own siblings
+    try:
+        spec.loader.exec_module(mod)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    finally:
+        sys.path.remove(here)
+    return mod
+
+
+def versions_of(mod):
+    try:
+        return json.loads(mod.versions())
+    except Exception as e:                 # a missing optional library should not lose the run
+        return {"error": f"{type(e).__name__}: {e}"[:200]}
+
+
+# ── the store ────────────────────────────────────────────────────────────────
+
+def record(store, run, model, fn, args, kwargs, result, env, versions, repeat=0):
+    """Append one measurement. `result` is what the function returned (JSON text or an
+    already-parsed object)."""
+    if isinstance(result, str):
+        result = json.loads(result)
+    line = {"run": run, "ts": datetime.datetime.now().isoformat(timespec="seconds"), "model": model, "fn": fn,
+            "args": list(args), "kwargs": dict(kwargs), "repeat": repeat, "env": env, "versions": versions,
+            "result": result}
+    store = pathlib.Path(store)
+    store.parent.mkdir(parents=True, exist_ok=True)
+    with open(store, "a", encoding="utf-8") as f:
+        f.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+
+def load(store):
+    rows = []
+    try:
+        with open(store, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rows.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return rows
+
+
+def runs(rows):
+    """Run ids in the order they were first written."""
+    seen = {}
+    for r in rows:
+        seen.setdefault(r["run"], r)
+    return list(seen)
+
+
+def resolve(ids, which):
+    if which in ("latest", "previous"):
+        if len(ids) < (1 if which == "latest" else 2):
+            sys.exit(f"the store has {len(ids)} run(s); nothing is {which!r}")
+        return ids[-1] if which == "latest" else ids[-2]
+    hits = [i for i in ids if i.startswith(which)]
+    if len(hits) != 1:
+        sys.exit(f"{which!r} matches {len(hits)} runs")
+    return hits[0]
+
+
+# ── metrics: which numbers are timings, and which way is worse ───────────────
+
+def metrics(obj, path=""):
+    """(path, number) for every numeric leaf. List items that carry a name (lib, name,
+    label, key, codec) are addressed by it, so rows keep their identity across runs."""
+    if isinstance(obj, bool) or obj is None:
+        return
+    if isinstance(obj, (int, float)):
+        if math.isfinite(obj):
+            yield path, float(obj)
+        return
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from metrics(v, f"{path}.{k}" if path else str(k))
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            tag = next((v[t] for t in ("lib", "name", "label", "key", "codec")
+                        if isinstance(v, dict) and isinstance(v.get(t), str)), None)
+            yield from metrics(v, f"{path}[{tag if tag is not None else i}]")
+
+
+def direction(path):
+    """+1 where bigger is worse (a time), -1 where bigger is better (a throughput), 0 for
+    anything that is not a speed — sizes, ratios, hit rates — which is not judged here."""
+    parts = [p.lower() for p in path.replace("[", ".").replace("]", "").split(".")]
+    last = parts[-1]
+    if any(p in ("per_hit_us", "per_store_us") for p in parts):
+        return 1
+    if last.endswith(("mbs", "per_s", "ops_s")):
+        return -1
+    if last in ("ms", "us", "seconds", "median", "min") or last.endswith(("_ms", "_us", "_s")):
+        return 1
+    return 0
+
+
+# ── the test ─────────────────────────────────────────────────────────────────
+
+def mann_whitney(a, b):
+    """Two-sided p for 'a and b come from one distribution'. Exact (by counting every
+    arrangement) when both samples are small and untied; normal approximation with tie
+    correction otherwise."""
+    m, n = len(a), len(b)
+    if not m or not n:
+        return 1.0
+    pooled = sorted([(x, 0) for x in a] + [(x, 1) for x in b])
+    ranks = [0.0] * len(pooled); i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for t in range(i, j + 1):
+            ranks[t] = (i + j) / 2 + 1
+        i = j + 1
+    ra = sum(r for r, (_, g) in zip(ranks, pooled) if g == 0)
+    u = ra - m * (m + 1) / 2
+    ties = len(set(x for x, _ in pooled)) < len(pooled)
+    if not ties and m * n <= 400:
+        counts = _u_counts(m, n)
+        total = sum(counts)
+        lo = min(u, m * n - u)
+        p = 2 * sum(counts[: int(lo) + 1]) / total
+        return min(1.0, p)
+    N = m + n
+    tie_term = 0.0
+    for x in set(x for x, _ in pooled):
+        t = sum(1 for y, _ in pooled if y == x)
+        tie_term += t ** 3 - t
+    var = m * n / 12 * ((N + 1) - tie_term / (N * (N - 1)))
+    if var <= 0:
+        return 1.0
+    zs = (abs(u - m * n / 2) - 0.5) / math.sqrt(var)
+    return min(1.0, math.erfc(max(zs, 0) / math.sqrt(2)))
+
+
+def _u_counts(m, n):
+    """How many of the C(m+n, m) orderings give each U from 0 to m*n."""
+    # f(i, j)[u] = f(i-1, j)[u-j] + f(i, j-1)[u]: the largest value came from one sample
+    # or the other. `prev` holds f(i-1, .) for every j; U is 0 whenever a sample is empty.
+    prev = [[1] for _ in range(n + 1)]
+    for i in range(1, m + 1):
+        cur = [[1]]
+        for j in range(1, n + 1):
+            row = [0] * (i * j + 1)
+            for u, c in enumerate(prev[j]):
+                row[u + j] += c
+            for u, c in enumerate(cur[j - 1]):
+                row[u] += c
+            cur.append(row)
+        prev = cur
+    return prev[n]
+
+
+def median(xs):
+    xs = sorted(xs); k = len(xs) // 2
+    return xs[k] if len(xs) % 2 else (xs[k - 1] + xs[k]) / 2
+
+
+def diff(rows, run_a, run_b, alpha=0.01, threshold=0.05):
+    """Per (model, fn, args, metric): both medians, the ratio, p, and a verdict."""
+    def samples(run):
+        out = {}; env = None; vers = {}
+        for r in rows:
+            if r["run"] != run:
+                continue
+            env = env or r.get("env"); vers[r["model"]] = r.get("versions")
+            call = f'{r["model"]}.{r["fn"]}({", ".join(map(repr, r["args"]))}' \
+                   + "".join(f", {k}={v!r}" for k, v in sorted(r.get("kwargs", {}).items())) + ")"
+            for path, v in metrics(r["result"]):
+                out.setdefault((call, path), []).append(v)
+        return out, env or {}, vers
+    A, env_a, vers_a = samples(run_a); B, env_b, vers_b = samples(run_b)
+    found = []
+    for key in sorted(set(A) & set(B)):
+        sign = direction(key[1])
+        if not sign:
+            continue
+        a, b = A[key], B[key]
+        ma, mb = median(a), median(b)
+        if ma <= 0 or mb <= 0:
+            continue
+        worse = (mb / ma) if sign > 0 else (ma / mb)      # > 1 means run B is worse
+        p = mann_whitney(a, b)
+        # the smallest p any ordering of len(a) + len(b) samples can give: 2 / C(m+n, m).
+        # Above alpha no gap can be called, so "same" would be a guess — say so instead
+        verdict = ("too few samples" if 2 / math.comb(len(a) + len(b), len(a)) >= alpha else
+                   "regression" if worse > 1 + threshold and p < alpha else
+                   "improvement" if worse < 1 / (1 + threshold) and p < alpha else "same")
+        found.append({"call": key[0], "metric": key[1], "a": ma, "b": mb, "n": [len(a), len(b)],
+                      "worse_x": worse, "p": p, "verdict": verdict})
+    changed = {m: {"a": vers_a.get(m), "b": vers_b.get(m)} for m in sorted(set(vers_a) | set(vers_b))
+               if vers_a.get(m) != vers_b.get(m)}
+    env_changed = {k: [env_a.get(k), env_b.get(k)] for k in sorted(set(env_a) | set(env_b))
+                   if k != "git" and env_a.get(k) != env_b.get(k)}
+    return {"a": run_a, "b": run_b, "alpha": alpha, "threshold": threshold, "metrics": found,
+            "versions_changed": changed, "environment_changed": env_changed,
+            "regressions": sum(1 for f in found if f["verdict"] == "regression"),
+            "too_few_samples": sum(1 for f in found if f["verdict"] == "too few samples")}
+
+
+# ── the command line ─────────────────────────────────────────────────────────
+
+def _arg(text):
+    """A command-line argument as the value it looks like: 3 -> int, 0.5 -> float."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--store", default=str(STORE), help="the JSONL store (default: %(default)s)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="call one floor-model function --repeat times and store each result")
+    rec.add_argument("model"); rec.add_argument("fn"); rec.add_argument("args", nargs="*")
+    rec.add_argument("--repeat", type=int, default=5); rec.add_argument("--run", default=None)
+    sub.add_parser("runs", help="list the runs in the store")
+    d = sub.add_parser("diff", help="compare two runs; exit 1 if anything regressed")
+    d.add_argument("a", nargs="?", default="previous"); d.add_argument("b", nargs="?", default="latest")
+    d.add_argument("--alpha", type=float, default=0.01)
+    d.add_argument("--threshold", type=float, default=0.05, help="smallest slowdown worth reporting (0.05 = 5%%)")
+    d.add_argument("--all", action="store_true", help="print unchanged metrics too")
+    d.add_argument("--json", action="store_true")
+    o = ap.parse_args(argv)
+
+    if o.cmd == "record":
+        env = environment(); run = o.run or new_run_id(env)
+        mod = load_core(o.model); fn = getattr(mod, o.fn); args = [_arg(a) for a in o.args]
+        init = getattr(mod, "init_samples", None)
+        if init:
+            init()
+        vers = versions_of(mod)
+        for i in range(o.repeat):
+            record(o.store, run, o.model, o.fn, args, {}, fn(*args), env, vers, repeat=i)
+        print(f"{run}: {o.repeat} x {o.model}.{o.fn} -> {o.store}")
+        return 0
+
+    rows = load(o.store); ids = runs(rows)
+    if o.cmd == "runs":
+        for i in ids:
+            r = next(x for x in rows if x["run"] == i); n = sum(1 for x in rows if x["run"] == i)
+            env = r.get("env", {})
+            print(f'{i}  {n:5d} measurements  python {env.get("python")}  {env.get("cpu")}  git {env.get("git")}')
+        return 0
+
+    res = diff(rows, resolve(ids, o.a), resolve(ids, o.b), o.alpha, o.threshold)
+    if o.json:
+        print(json.dumps(res, indent=1))
+    else:
+        print(f'{res["a"]} -> {res["b"]}   (alpha {o.alpha}, threshold {o.threshold:.0%})')
+        for k, (va, vb) in res["environment_changed"].items():
+            print(f"  environment: {k}: {va} -> {vb}")
+        for m, v in res["versions_changed"].items():
+            print(f'  versions: {m}: {json.dumps(v["a"])} -> {json.dumps(v["b"])}')
+        for f in res["metrics"]:
+            if f["verdict"] in ("same", "too few samples") and not o.all:
+                continue
+            mark = {"regression": "SLOWER", "improvement": "faster", "same": "",
+                    "too few samples": "?"}[f["verdict"]]
+            print(f'  {mark:7s} {f["worse_x"]:6.3f}x  p={f["p"]:.4f}  {f["call"]}  {f["metric"]}  '
+                  f'{f["a"]:.6g} -> {f["b"]:.6g}')
+        print(f'{res["regressions"]} regression(s) in {len(res["metrics"])} timing metrics')
+        if res["too_few_samples"]:
+            ns = sorted({tuple(f["n"]) for f in res["metrics"] if f["verdict"] == "too few samples"})
+            print(f'warning: {res["too_few_samples"]} metric(s) could not be judged — samples per run '
+                  f'{", ".join(f"{a} vs {b}" for a, b in ns)} cannot reach p < {o.alpha}; '
+                  f'record with --repeat 5 or more', file=sys.stderr)
+    return 1 if res["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@ One copy, three readers: floor-model pages fetch it into Pyodide alongside their
 the marimo notebooks import it, the native benches import it. Anything measured on more
 than one page lives here so the number means the same thing everywhere.
 """
-import json, random, time
+import gc, hashlib, io, json, math, mmap, os, random, struct, sys, time, tracemalloc
 
 __version__ = "2026-08-19"
 
@@ -16,31 +16,266 @@ def best(fn, arg, budget_s=0.12, min_reps=3):
     timed in batches calibrated to take at least 5 ms — fifty clamp ticks — before a reading
     is trusted. Slow calls get one measured rep. Returns (seconds_per_call, reps).
     """
-    t0 = time.perf_counter(); fn(arg); first = time.perf_counter() - t0
+    samples, _, _ = _batches(fn, arg, budget_s, min_reps)
+    b = samples[0]
+    for s in samples[1:]:
+        if s > 0: b = min(b, s)
+    return max(b, 1e-9), len(samples)
+
+
+# Off on the pages: a collection landing mid-batch is part of what a browser visitor sees.
+# The native bench's isolated mode (scripts/workshop_bench.py --isolate) turns it on, and
+# then every timed batch runs with the cyclic collector paused, as timeit's do — garbage
+# left by the last measurement gets collected between batches, not inside this one.
+GC_OFF = False
+
+
+def _timed(fn, arg, k):
+    """Seconds for k back-to-back calls of fn(arg): the one timed loop."""
+    off = GC_OFF and gc.isenabled()
+    if off: gc.disable()
+    try:
+        t0 = time.perf_counter()
+        for _ in range(k): fn(arg)
+        return time.perf_counter() - t0
+    finally:
+        if off: gc.enable()
+
+
+def _batches(fn, arg, budget_s, min_reps, max_reps=40):
+    """The loop behind best() and timing(): seconds per call for every batch (the
+    calibrating batch first), the batch size k, and what ended it — "slow" (one call
+    overran the budget), "cap" (max_reps batches) or "budget"."""
+    first = _timed(fn, arg, 1)
     if first > budget_s:
-        return first, 1
+        return [first], 1, "slow"
     k = 1
     while True:                       # calibrate the batch, not the call
-        t0 = time.perf_counter()
-        for _ in range(k): fn(arg)
-        dt = time.perf_counter() - t0
+        dt = _timed(fn, arg, k)
         if dt >= 0.005 or k >= 200_000: break
         k *= 4
-    b = dt / k; reps = 1; total = dt
-    while reps < min_reps or total < budget_s:
-        t0 = time.perf_counter()
-        for _ in range(k): fn(arg)
-        dt = time.perf_counter() - t0
-        if dt > 0: b = min(b, dt / k)
-        reps += 1; total += dt
-        if reps >= 40: break
-    return max(b, 1e-9), reps
+    samples = [dt / k]; total = dt
+    while len(samples) < min_reps or total < budget_s:
+        dt = _timed(fn, arg, k)
+        samples.append(dt / k); total += dt
+        if len(samples) >= max_reps: return samples, k, "cap"
+    return samples, k, "budget"
 
 
-def json_logs(target=512 * 1024, seed=7):
-    """512 KB of API access logs, one JSON object per line — deterministic, so the same bytes
-    are measured natively, in every page that uses them (1.050 compresso, 1.056 jsonic-rituals)
-    and on the machine the survey figures came from."""
+def _quantile(xs, q):
+    """Linear-interpolated quantile of a sorted list."""
+    if len(xs) == 1: return xs[0]
+    i = q * (len(xs) - 1); lo = int(i); hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (i - lo)
+
+
+def timing(fn, arg, budget_s=0.12, min_reps=3, max_reps=40, boot=1000, seed=7):
+    """best(), keeping every batch: the distribution, not just its floor.
+
+    Same batching and budget as best(). Returns a dict, seconds per call throughout:
+    min, median, q1/q3 and iqr; mad (median absolute deviation) and outliers — batches
+    whose modified z-score 0.6745·|x − median| / mad exceeds 3.5 (Iglewicz & Hoaglin);
+    ci, a bootstrap 95% interval on the median (`boot` resamples, seeded, so a rerun on
+    the same samples gives the same interval); plus the batch size k, the batch count n,
+    stopped_by ("slow", "cap" or "budget") and the samples themselves. Two medians whose
+    intervals overlap are not a ranking.
+    """
+    samples, k, stop = _batches(fn, arg, budget_s, min_reps, max_reps)
+    xs = sorted(samples); n = len(xs)
+    med = _quantile(xs, 0.5); q1 = _quantile(xs, 0.25); q3 = _quantile(xs, 0.75)
+    mad = _quantile(sorted(abs(x - med) for x in xs), 0.5)
+    outliers = sum(1 for x in xs if mad > 0 and 0.6745 * abs(x - med) / mad > 3.5)
+    if n > 1:
+        r = random.Random(seed)
+        meds = sorted(_quantile(sorted(r.choices(xs, k=n)), 0.5) for _ in range(boot))
+        ci = [_quantile(meds, 0.025), _quantile(meds, 0.975)]
+    else:
+        ci = [xs[0], xs[0]]
+    return {"min": max(xs[0], 1e-9), "median": med, "q1": q1, "q3": q3, "iqr": q3 - q1,
+            "mad": mad, "outliers": outliers, "ci": ci, "n": n, "k": k, "stopped_by": stop,
+            "samples": samples}
+
+
+def profile(fn, arg, budget_s=0.12, min_reps=3, allocs=True, counters=True):
+    """best(), and why: what the time went on.
+
+    Runs best()'s batches and, over all of them, reads the process CPU clock against the
+    wall clock (a cpu_share well under 1 is waiting — I/O, a lock, fsync; over 1 is other
+    threads working for the call), the cyclic GC's collections per generation and, on
+    Linux where perf_event_open(2) is permitted, this thread's user-space cycles and
+    instructions. Then one more call under tracemalloc gives its peak allocation above
+    what was live before it, what it left allocated, and the net change in live blocks —
+    Python's allocator only: a C library's own malloc is invisible to it.
+
+    Returns a dict: seconds (best per call, as best() would), k, n, calls, wall_s,
+    cpu_s, cpu_share; gc {collections [gen0, gen1, gen2], per_1k_calls}; alloc
+    {peak_bytes, net_bytes, net_blocks} or None; perf {cycles, instructions per call,
+    ipc} or {unavailable: why}. Divide by your own inner loop count, as with best().
+    """
+    fds, why = _perf_open() if counters else (None, "not requested")
+    g0 = [g["collections"] for g in gc.get_stats()]
+    if fds:
+        for fd in fds: _perf_ioctl(fd, 0x2403); _perf_ioctl(fd, 0x2400)   # RESET, ENABLE
+    w0 = time.perf_counter(); c0 = time.process_time()
+    samples, k, stop = _batches(fn, arg, budget_s, min_reps)
+    wall = time.perf_counter() - w0; cpu = time.process_time() - c0
+    counts = None
+    if fds:
+        for fd in fds: _perf_ioctl(fd, 0x2401)                          # DISABLE
+        counts = [struct.unpack("=q", os.read(fd, 8))[0] for fd in fds]
+        for fd in fds: os.close(fd)
+    gcs = [g["collections"] - b for g, b in zip(gc.get_stats(), g0)]
+    calls = 1 if stop == "slow" else 1 + (4 * k - 1) // 3 + (len(samples) - 1) * k
+    b = samples[0]
+    for x in samples[1:]:
+        if x > 0: b = min(b, x)
+    out = {"seconds": max(b, 1e-9), "k": k, "n": len(samples), "calls": calls, "wall_s": wall,
+           "cpu_s": cpu, "cpu_share": cpu / wall if wall > 0 else None,
+           "gc": {"collections": gcs, "per_1k_calls": sum(gcs) * 1000 / calls}, "alloc": None,
+           "perf": ({"cycles": counts[0] / calls, "instructions": counts[1] / calls,
+                     "ipc": counts[1] / counts[0] if counts[0] else None} if counts else {"unavailable": why})}
+    if allocs:
+        tracing = tracemalloc.is_tracing()
+        if not tracing: tracemalloc.start()
+        try:
+            gc.collect(); before, _ = tracemalloc.get_traced_memory(); tracemalloc.reset_peak()
+            blocks = sys.getallocatedblocks()
+            fn(arg)
+            after, peak = tracemalloc.get_traced_memory()
+            out["alloc"] = {"peak_bytes": peak - before, "net_bytes": after - before,
+                            "net_blocks": sys.getallocatedblocks() - blocks}
+        finally:
+            if not tracing: tracemalloc.stop()
+    return out
+
+
+# perf_event_open(2) syscall numbers; the asm-generic table covers the newer 64-bit ports.
+_PERF_SYSCALL = {"x86_64": 298, "amd64": 298, "i386": 336, "i686": 336, "aarch64": 241, "arm64": 241,
+                 "riscv64": 241, "loongarch64": 241, "ppc64le": 319, "ppc64": 319, "s390x": 331}
+
+
+def _perf_open():
+    """Two disabled counters — user-space cycles and instructions of this thread — as
+    (fds, None), or (None, why not). Most containers and perf_event_paranoid >= 3 say no."""
+    if not sys.platform.startswith("linux"): return None, f"perf_event_open is Linux-only ({sys.platform})"
+    import ctypes, platform
+    nr = _PERF_SYSCALL.get(platform.machine().lower())
+    if nr is None: return None, f"no perf_event_open syscall number for {platform.machine()}"
+    libc = ctypes.CDLL(None, use_errno=True); libc.syscall.restype = ctypes.c_long
+    fds = []
+    for config in (0, 1):             # PERF_COUNT_HW_CPU_CYCLES, PERF_COUNT_HW_INSTRUCTIONS
+        # perf_event_attr, the 64-byte first version, in native byte order (s390x and ppc64
+        # are big-endian): type PERF_TYPE_HARDWARE, flags disabled | exclude_kernel |
+        # exclude_hv (user space is what paranoid=2 allows). The flags are C bitfields,
+        # which a big-endian ABI allocates from the top bit down.
+        flags = sum(1 << (63 - bit if sys.byteorder == "big" else bit) for bit in (0, 5, 6))
+        attr = ctypes.create_string_buffer(struct.pack("=IIQQQQQIIQ", 0, 64, config, 0, 0, 0,
+                                                       flags, 0, 0, 0))
+        fd = libc.syscall(nr, attr, 0, -1, -1, 0)   # this thread, any CPU, no group
+        if fd < 0:
+            err = ctypes.get_errno()
+            for f in fds: os.close(f)
+            hint = "; see /proc/sys/kernel/perf_event_paranoid" if err in (1, 13) else ""
+            return None, f"perf_event_open: {os.strerror(err)}{hint}"
+        fds.append(fd)
+    return fds, None
+
+
+def _perf_ioctl(fd, request):
+    import fcntl
+    fcntl.ioctl(fd, request, 0)
+
+
+def compare(fns, arg, budget_s=1.0, min_rounds=5, max_rounds=200, tie=0.01, alpha=0.01):
+    """Race contenders against each other, interleaved, until the ranking is settled.
+
+    `fns` maps a name to a function of `arg`. Every contender is timed at one common
+    batch size k — the smallest of their calibrations, as best() calibrates, so the
+    slowest still gets a >= 5 ms batch — and the fixed cost of timing a batch is measured
+    and taken off each: with k or overhead differing between two sides, a function raced
+    against itself comes out a few percent slower than itself. Every round times one
+    batch of each, in an order that rotates round to round, so a clock that drifts
+    (thermal throttling, a neighbour waking up) drifts under all of them alike. Each
+    contender is judged against its neighbour in the ranking on paired per-round ratios,
+    which cancel that drift. A pair is settled once its ratio's interval clears 1
+    (ranked) or sits inside 1 ± `tie` (a tie) — at a boundary that widens with every look
+    (_boundary), so that testing after each round still ranks two equal contenders with
+    probability at most `alpha`. Stops when every pair is settled, after max_rounds, or at
+    budget_s — a 100x gap settles in min_rounds; a 1.05x gap takes what it takes.
+
+    Returns a dict: order (fastest first), each contender's median seconds per call
+    and k, its ratio to the fastest with a 95% interval, rounds, seconds, settled and
+    stopped_by ("settled", "cap" or "budget"; "too few rounds" when fewer than two ran,
+    and the intervals are [None, None]: one round bounds nothing).
+    """
+    if max_rounds < 1: raise ValueError(f"max_rounds must be at least 1, not {max_rounds}")
+    names = list(fns); T0 = time.perf_counter(); min_rounds = max(2, min_rounds); k = 200_000
+    for nm in names:                  # calibrate each batch to >= 5 ms, or one slow call
+        f = fns[nm]; kn = 1
+        while kn < k:
+            if _timed(f, arg, kn) >= 0.005: break
+            kn *= 4
+        k = min(k, kn)
+    over = min(_timed(None, arg, 0) for _ in range(50))     # the clock reads and the loop set-up
+    logs = {nm: [] for nm in names}; rounds = 0; stop = "cap"; settled = False
+    while rounds < max_rounds:
+        for j in range(len(names)):
+            nm = names[(j + rounds) % len(names)]
+            logs[nm].append(math.log(max((_timed(fns[nm], arg, k) - over) / k, 1e-12)))
+        rounds += 1
+        if rounds >= min_rounds:
+            order = sorted(names, key=lambda nm: sum(logs[nm]) / rounds)
+            c = _boundary(rounds - min_rounds + 1, rounds, alpha)
+            settled = all(_paired(logs[a], logs[b], c, tie)[2] for a, b in zip(order, order[1:]))
+            if settled: stop = "settled"; break
+        if time.perf_counter() - T0 >= budget_s: stop = "budget"; break
+    if rounds < 2: stop = "too few rounds"
+    order = sorted(names, key=lambda nm: sum(logs[nm]) / rounds)
+    out = {}
+    for nm in order:
+        mean, half, _ = _paired(logs[nm], logs[order[0]], 1.96, tie)
+        xs = sorted(logs[nm])
+        out[nm] = {"median": math.exp(_quantile(xs, 0.5)), "k": k, "x": math.exp(mean),
+                   "ci": [math.exp(mean - half), math.exp(mean + half)] if math.isfinite(half) else [None, None]}
+    return {"order": order, "results": out, "rounds": rounds, "settled": settled,
+            "stopped_by": stop, "seconds": time.perf_counter() - T0}
+
+
+def _boundary(look, n, alpha):
+    """The critical value for a pair's look-th test, on n paired rounds. The look spends
+    alpha / (look·(look + 1)) of alpha — those shares sum to alpha however many looks there
+    are, so by the union bound the chance that any look ranks an even pair stays under
+    alpha (conservative, which a benchmark can afford) — as a two-sided Student t
+    quantile on n − 1 degrees of freedom, from the normal one by Cornish-Fisher."""
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(1 - alpha / (look * (look + 1)) / 2); v = n - 1
+    return (z + (z ** 3 + z) / (4 * v) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3))
+
+
+def _paired(la, lb, c, tie):
+    """Mean paired log-ratio of a over b, its half-width at critical value c, and whether
+    that settles it: the interval clears 0 (a real gap) or sits inside ±log(1 + tie) (a
+    tie). One round has no spread to go on: the half-width is infinite, nothing settled."""
+    d = [a - b for a, b in zip(la, lb)]; n = len(d)
+    if n < 2: return (d[0] if d else 0.0), math.inf, False
+    mean = sum(d) / n
+    sd = math.sqrt(sum((x - mean) ** 2 for x in d) / (n - 1))
+    half = c * sd / math.sqrt(n)
+    return mean, half, abs(mean) > half or abs(mean) + half < math.log1p(tie)
+
+
+# ── shared samples ──────────────────────────────────────────────────────
+# Every sample is deterministic, so it only has to be generated once: natively it is written
+# to a cache directory under a name derived from what makes it (sample, generator revision,
+# size, seed) and memory-mapped from then on — json_logs() costs a Python loop and a
+# json.dumps per line, every import of every model that uses it. 512 KB sits in L2 and
+# flatters every codec; SCALES are the sizes that don't, and only ever exist on disk.
+
+SCALES = {"512K": 512 * 1024, "64M": 64 << 20, "1G": 1 << 30}
+
+
+def _write_logs(f, target, seed):
     r = random.Random(seed)
     routes = ["/api/v1/users", "/api/v1/orders", "/api/v1/orders/{id}", "/api/v1/cart",
               "/api/v1/products", "/api/v1/products/{id}/reviews", "/health", "/api/v1/auth/token"]
@@ -48,7 +283,7 @@ def json_logs(target=512 * 1024, seed=7):
     agents = ["Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/126.0 Safari/537.36",
               "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148 Safari/604.1",
               "python-requests/2.32.3", "curl/8.5.0", "okhttp/4.12.0"]
-    out = []; size = 0; t = 1_723_900_000
+    out = []; size = 0; pending = 0; t = 1_723_900_000
     while size < target:
         t += r.randint(0, 3)
         rec = {"ts": t, "level": r.choice(["INFO"] * 8 + ["WARN", "ERROR"]),
@@ -60,10 +295,65 @@ def json_logs(target=512 * 1024, seed=7):
                "ua": r.choice(agents), "region": r.choice(["us-west-2", "us-east-1", "eu-central-1"]),
                "tags": r.sample(["cache-hit", "cache-miss", "retry", "slow", "auth", "cdn"], r.randint(0, 3))}
         line = json.dumps(rec, separators=(",", ":")) + "\n"
-        out.append(line); size += len(line)
-    return "".join(out).encode()
+        out.append(line); size += len(line); pending += len(line)
+        if pending >= 1 << 20: f.write("".join(out).encode()); out = []; pending = 0
+    f.write("".join(out).encode())
+
+
+def _write_random(f, n, seed):
+    r = random.Random(seed)           # randbytes in 4-byte multiples concatenates to randbytes(n)
+    for i in range(0, n, 1 << 24): f.write(r.randbytes(min(1 << 24, n - i)))
+
+
+# name: (writer, revision, default size). Bump the revision when a writer's output changes.
+_SAMPLES = {"json_logs": (_write_logs, 1, 512 * 1024), "random": (_write_random, 1, 256 * 1024)}
+_MAPPED = {}
+
+
+def sample_cache():
+    """Where samples are kept: $WORKSHOP_CACHE, else survey-workshop/samples under the user
+    cache directory. None in the browser, where there is no disk worth the name."""
+    if sys.platform == "emscripten": return None
+    if os.environ.get("WORKSHOP_CACHE"): return os.environ["WORKSHOP_CACHE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "survey-workshop", "samples")
+
+
+def sample(name, size=None, seed=7):
+    """A shared sample as a read-only memoryview — "json_logs" or "random", `size` in bytes
+    or a SCALES key ("64M", "1G"). Natively the view is over an mmap of the cached file, so
+    a 1 GB sample costs page cache, not heap, and the same pages serve every process. The
+    first call for a given sample writes it (1 GB of logs takes a minute or two); a
+    half-written file is never seen, it lands by rename."""
+    write, rev, default = _SAMPLES[name]
+    size = int(SCALES.get(size, size or default)); key = (name, size, seed)
+    if key in _MAPPED: return _MAPPED[key]
+    root = sample_cache()
+    if root is None:
+        buf = io.BytesIO(); write(buf, size, seed); view = memoryview(buf.getvalue())
+    else:
+        digest = hashlib.sha256(json.dumps([name, rev, size, seed]).encode()).hexdigest()[:16]
+        path = os.path.join(root, f"{name}-{size}-{seed}-{digest}.bin")
+        if not os.path.exists(path):
+            os.makedirs(root, exist_ok=True); tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "wb") as f: write(f, size, seed)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp): os.remove(tmp)
+        with open(path, "rb") as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    _MAPPED[key] = view
+    return view
+
+
+def json_logs(target=512 * 1024, seed=7):
+    """512 KB of API access logs, one JSON object per line — deterministic, so the same bytes
+    are measured natively, in every page that uses them (1.050 compresso, 1.056 jsonic-rituals)
+    and on the machine the survey figures came from. A larger target extends the same lines."""
+    return bytes(sample("json_logs", target, seed))
 
 
 def random_bytes(n=256 * 1024, seed=7):
     """Incompressible: what any already-compressed file looks like to a codec."""
-    return random.Random(seed).randbytes(n)
+    return bytes(sample("random", n, seed))
@@ -9,21 +9,35 @@ Three questions, in the order a cache decision is actually made:
      diskcache's SQLite (the network tier is measured by the bench, not the page);
   2. which eviction policy earns the hit rate, on the access pattern you actually have —
      replayed through cachetools' own cache classes, against the offline optimum;
-  3. does it pay — the break-even cost of the function you are wrapping.
+  3. does it pay — the break-even cost of the function you are wrapping, and under
+     concurrency whether a cold key's misses are coalesced (amemoize) or stampede.
 """
-import json, random, sys, time, functools, heapq, os, shutil, tempfile
+import asyncio, json, math, pickle, random, struct, sys, time, functools, gzip, hashlib, heapq, os, shutil, tempfile, threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
 import cachetools
-from workshop import best as _best
+from workshop import best as _best, profile as _profile, sample as _sample
 
 # ── 1. what a hit costs ──────────────────────────────────────────────────────
 
-def _per_call_us(run, n, budget_s):
-    s, _ = _best(run, None, budget_s, min_reps=2)
+def _per_call_us(run, n, budget_s, into=None, label=None):
+    if into is None:
+        s, _ = _best(run, None, budget_s, min_reps=2)
+    else:      # the same best-of number, plus where a hit's time goes (workshop.profile)
+        p = _profile(run, None, budget_s, min_reps=2); s = p["seconds"]; perf = p["perf"]
+        into[label] = {"cpu_share": p["cpu_share"], "gc_per_1k_hits": p["gc"]["per_1k_calls"] / n,
+                       "py_peak_bytes": p["alloc"]["peak_bytes"], "py_net_blocks": p["alloc"]["net_blocks"],
+                       "cycles_per_hit": perf["cycles"] / n if "cycles" in perf else None,
+                       "instructions_per_hit": perf["instructions"] / n if "cycles" in perf else None,
+                       "ipc": perf.get("ipc")}
+        if "cycles" not in perf: into[label]["counters"] = perf["unavailable"]
     return s / n * 1e6
 
-def hit_cost(budget_ms=80):
+def hit_cost(budget_ms=80, detail=False):
     """µs per call for a hit on each tier, and µs per store (a miss's extra cost), using the
-    cheapest possible wrapped function so the overhead is the whole number."""
+    cheapest possible wrapped function so the overhead is the whole number. detail=True
+    profiles the hits too (per_hit_profile): CPU against wall — diskcache's hits wait on
+    SQLite — GC, allocation and, on Linux where allowed, cycles and instructions per hit."""
     import diskcache
     n = 1000; keys = list(range(n))
     def work(k): return k + 1
@@ -34,18 +48,22 @@ def hit_cost(budget_ms=80):
     f_ct_lfu = cachetools.cached(cachetools.LFUCache(2048))(work)
     tmp = tempfile.mkdtemp(prefix="cache-me-"); dc = diskcache.Cache(tmp)
     f_dc = dc.memoize()(work)
+    shm = _shared_cache(4 * n)    # natively (Pyodide has none); 8-way buckets: room so all n stay
     for k in keys: f_lru(k); f_ct_lru(k); f_ct_ttl(k); f_ct_lfu(k); f_dc(k); dc.set(k, k + 1)
+    if shm is not None:
+        for k in keys: shm[k] = k + 1
     def loop(f, ks=keys):
         def run(_):
             for k in ks: f(k)
         return run
     B = budget_ms / 1000
-    hits = {}
+    hits = {}; prof = {} if detail else None
     for label, f in [("the function itself (k + 1)", work), ("dict lookup", d.__getitem__),
                      ("functools.lru_cache (stdlib, C)", f_lru), ("cachetools LRUCache", f_ct_lru),
                      ("cachetools TTLCache", f_ct_ttl), ("cachetools LFUCache", f_ct_lfu),
-                     ("diskcache.memoize (SQLite)", f_dc), ("diskcache.get", dc.get)]:
-        hits[label] = _per_call_us(loop(f), n, B)
+                     ("diskcache.memoize (SQLite)", f_dc), ("diskcache.get", dc.get)] + \
+                    ([("SharedCache[key] (shared memory)", shm.__getitem__)] if shm is not None else []):
+        hits[label] = _per_call_us(loop(f), n, B, prof, label)
     # stores: a run fills a fresh cache with n new keys
     def st_dict(_):
         c = {}
@@ -66,14 +84,362 @@ def hit_cost(budget_ms=80):
         base = i[0] * 1000 + 100_000; i[0] += 1
         with dc.transact():
             for k in kd: dc.set(base + k, k)
+    def st_shm(_):
+        base = i[0] * 1000 + 100_000; i[0] += 1
+        for k in keys: shm[base + k] = k
     stores = {"dict": _per_call_us(st_dict, n, B), "functools.lru_cache": _per_call_us(st_lru, n, B),
               "cachetools LRUCache": _per_call_us(st_ct(cachetools.LRUCache), n, B),
               "cachetools TTLCache": _per_call_us(st_ct(cachetools.TTLCache, ttl=600), n, B),
               "cachetools LFUCache": _per_call_us(st_ct(cachetools.LFUCache), n, B),
               "diskcache.set": _per_call_us(st_dc, len(kd), B),
               "diskcache.set, 200 in one transaction": _per_call_us(st_dc_tx, len(kd), B)}
+    if shm is not None:
+        stores["SharedCache[key] = value"] = _per_call_us(st_shm, n, B); shm.unlink()
     dc.close(); shutil.rmtree(tmp, ignore_errors=True)
-    return json.dumps({"per_hit_us": hits, "per_store_us": stores})
+    out = {"per_hit_us": hits, "per_store_us": stores}
+    if detail: out["per_hit_profile"] = prof
+    return json.dumps(out)
+
+# ── 1a. between the process and the disk ─────────────────────────────────────
+# A pre-forked server (gunicorn, uWSGI, a multiprocessing pool) gives each worker its own
+# in-process cache: N cold copies of the same entries, N times the memory. diskcache shares
+# one, at SQLite's price. SharedCache is the tier in between: one fixed-size table in a
+# multiprocessing.shared_memory segment that every worker attaches to by name.
+#
+# The table is set-associative — a key hashes to a bucket of 8 slots, and lives in one of
+# them — so a lookup reads one bucket and nothing moves. Eviction is CLOCK within the
+# bucket: a hit sets the slot's reference byte; a store into a full bucket sweeps from the
+# bucket's hand, clearing set bytes, and takes the first clear one (a new entry starts
+# clear, so a key must be hit once to survive a sweep). Readers take no lock: each bucket
+# has a seqlock counter that a writer makes odd while it writes, and a reader retries if
+# the counter was odd or changed while it read — for a while; then it takes the writers'
+# lock. A writer killed mid-write leaves its bucket's counter odd: the next one under the
+# lock empties that bucket and evens the counter before writing. Writers exclude each other
+# with flock(2) on a lock file beside the segment, plus a thread lock, since flock does not
+# tell threads apart. Keys and values are pickled into fixed-size slots, and hashed with
+# blake2b, not hash(): a str's hash differs from process to process. POSIX only; not under
+# Pyodide.
+
+_SHM_MAGIC = b"CACHEME1"
+_SHM_HEADER = struct.Struct("<8sIIIII")      # magic, buckets, ways, key_max, value_max, count
+
+def _shm_attach(name):
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name, track=False)       # 3.13+
+    except TypeError:                 # older: attaching registers it to be unlinked at exit — don't
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register; resource_tracker.register = lambda *a: None
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+class SharedCache(MutableMapping):
+    """A cache in shared memory that any process can attach to by name — see above. maxsize
+    is rounded up to whole buckets; a pickled key over key_max bytes, or value over
+    value_max, raises ValueError. The creating process should unlink() it when done."""
+    def __init__(self, maxsize, name=None, key_max=32, value_max=64, ways=8, _attach=False):
+        from multiprocessing import shared_memory
+        if _attach:
+            self._shm = _shm_attach(name)
+            magic, nb, ways, key_max, value_max, _ = _SHM_HEADER.unpack_from(self._shm.buf, 0)
+            if magic != _SHM_MAGIC: raise ValueError(f"{name} is not a SharedCache")
+        else:
+            nb = max(1, -(-int(maxsize) // ways))
+        slot = key_max + value_max; slots = nb * ways
+        self._seq = 64; self._hand = self._seq + 4 * nb; self._ref = self._hand + nb
+        self._fp = (self._ref + slots + 7) & ~7; self._len = self._fp + 8 * slots; self._data = self._len + 8 * slots
+        if not _attach:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=self._data + slot * slots)
+            self._shm.buf[:self._data] = bytes(self._data)
+            _SHM_HEADER.pack_into(self._shm.buf, 0, _SHM_MAGIC, nb, ways, key_max, value_max, 0)
+        self.name = self._shm.name; self.maxsize = slots; self.nbytes = self._shm.size
+        self._nb, self._ways, self._kmax, self._vmax, self._slot = nb, ways, key_max, value_max, slot
+        self._fps = struct.Struct(f"<{ways}Q"); self._buf = self._shm.buf
+        self._tlock = threading.Lock(); self._lockfd = None; self._pid = None; self._owner = not _attach
+
+    @classmethod
+    def attach(cls, name):
+        return cls(0, name, _attach=True)
+
+    def _where(self, key):
+        kb = pickle.dumps(key, 5)
+        h = int.from_bytes(hashlib.blake2b(kb, digest_size=8).digest(), "little")
+        return kb, h % self._nb, h | 1
+
+    def _find(self, b, fp, kb):
+        buf = self._buf
+        for w, f in enumerate(self._fps.unpack_from(buf, self._fp + 8 * self._ways * b)):
+            if f == fp:
+                slot = b * self._ways + w; kl = struct.unpack_from("<I", buf, self._len + 8 * slot)[0]
+                d = self._data + slot * self._slot
+                if buf[d:d + kl] == kb: return slot
+        return None
+
+    _SPIN = 1000                              # reader retries before it takes the writers' lock
+
+    def _read(self, b, fp, kb):
+        slot = self._find(b, fp, kb)
+        if slot is None: return None, None
+        vl = struct.unpack_from("<I", self._buf, self._len + 8 * slot + 4)[0]
+        d = self._data + slot * self._slot + self._kmax
+        return slot, bytes(self._buf[d:d + vl])
+
+    def __getitem__(self, key):
+        kb, b, fp = self._where(key); buf = self._buf; seq = self._seq + 4 * b
+        for _ in range(self._SPIN):
+            s1 = struct.unpack_from("<I", buf, seq)[0]
+            if s1 & 1: time.sleep(0); continue              # a writer is in this bucket
+            slot, val = self._read(b, fp, kb)
+            if struct.unpack_from("<I", buf, seq)[0] == s1: break
+        else:                                 # a writer still there, or killed mid-write: wait it out
+            self._lock()
+            try:
+                self._settle(b); slot, val = self._read(b, fp, kb)
+            finally:
+                self._unlock()
+        if slot is None: raise KeyError(key)
+        buf[self._ref + slot] = 1
+        return pickle.loads(val)
+
+    def __contains__(self, key):
+        kb, b, fp = self._where(key)
+        return self._find(b, fp, kb) is not None
+
+    def _lock(self):
+        self._tlock.acquire()
+        if self._pid != os.getpid():          # a forked child shares the parent's descriptor, and its lock
+            import fcntl
+            self._lockfd = os.open(os.path.join(tempfile.gettempdir(), f"{self.name.lstrip('/')}.lock"),
+                                   os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid(); self._flock = fcntl.flock
+        self._flock(self._lockfd, 2)          # LOCK_EX
+
+    def _unlock(self):
+        self._flock(self._lockfd, 8)          # LOCK_UN
+        self._tlock.release()
+
+    def _settle(self, b):
+        """Under the lock: an odd sequence means the writer that made it odd died there, and
+        the bucket may be torn. Empty it and make the sequence even; return the sequence."""
+        buf = self._buf; seq = self._seq + 4 * b; s0 = struct.unpack_from("<I", buf, seq)[0]
+        if s0 & 1:
+            W = self._ways; lost = sum(1 for f in self._fps.unpack_from(buf, self._fp + 8 * W * b) if f)
+            buf[self._fp + 8 * W * b:self._fp + 8 * W * (b + 1)] = bytes(8 * W)
+            buf[self._ref + b * W:self._ref + (b + 1) * W] = bytes(W)
+            if lost: self._count(-lost)
+            s0 = (s0 + 1) & 0xFFFFFFFF; struct.pack_into("<I", buf, seq, s0)
+        return s0
+
+    def _write(self, b, fn):
+        buf = self._buf; seq = self._seq + 4 * b; self._lock()
+        try:
+            s0 = self._settle(b); struct.pack_into("<I", buf, seq, (s0 + 1) & 0xFFFFFFFF)
+            try:
+                return fn()
+            finally:
+                struct.pack_into("<I", buf, seq, (s0 + 2) & 0xFFFFFFFF)
+        finally:
+            self._unlock()
+
+    def _count(self, delta):
+        off = _SHM_HEADER.size - 4
+        struct.pack_into("<I", self._buf, off, struct.unpack_from("<I", self._buf, off)[0] + delta)
+
+    def __setitem__(self, key, value):
+        kb, b, fp = self._where(key); vb = pickle.dumps(value, 5)
+        if len(kb) > self._kmax or len(vb) > self._vmax:
+            raise ValueError(f"SharedCache slots hold {self._kmax}-byte keys and {self._vmax}-byte values, pickled")
+        def store():
+            buf = self._buf; W = self._ways; slot = self._find(b, fp, kb)
+            if slot is None:
+                fps = self._fps.unpack_from(buf, self._fp + 8 * W * b)
+                if 0 in fps:
+                    slot = b * W + fps.index(0); self._count(1)
+                else:                         # CLOCK: clear reference bytes from the hand on
+                    hand = buf[self._hand + b]
+                    while buf[self._ref + b * W + hand]:
+                        buf[self._ref + b * W + hand] = 0; hand = (hand + 1) % W
+                    slot = b * W + hand; buf[self._hand + b] = (hand + 1) % W
+            d = self._data + slot * self._slot
+            buf[d:d + len(kb)] = kb; buf[d + self._kmax:d + self._kmax + len(vb)] = vb
+            struct.pack_into("<II", buf, self._len + 8 * slot, len(kb), len(vb))
+            struct.pack_into("<Q", buf, self._fp + 8 * slot, fp); buf[self._ref + slot] = 0
+        self._write(b, store)
+
+    def __delitem__(self, key):
+        kb, b, fp = self._where(key)
+        def drop():
+            slot = self._find(b, fp, kb)
+            if slot is None: raise KeyError(key)
+            struct.pack_into("<Q", self._buf, self._fp + 8 * slot, 0); self._count(-1)
+        self._write(b, drop)
+
+    def __len__(self):
+        return struct.unpack_from("<I", self._buf, _SHM_HEADER.size - 4)[0]
+
+    def __iter__(self):
+        """The keys present as the scan passes them — not a snapshot."""
+        buf = self._buf
+        for slot in range(self.maxsize):
+            if struct.unpack_from("<Q", buf, self._fp + 8 * slot)[0]:
+                kl = struct.unpack_from("<I", buf, self._len + 8 * slot)[0]; d = self._data + slot * self._slot
+                yield pickle.loads(bytes(buf[d:d + kl]))
+
+    def close(self):
+        self._buf = None; self._shm.close()
+        if self._lockfd is not None: os.close(self._lockfd); self._lockfd = None
+
+    def unlink(self):
+        """Remove the segment and its lock file; the creator's job, once every worker is done."""
+        name = self.name; self.close(); self._shm.unlink()
+        try: os.remove(os.path.join(tempfile.gettempdir(), f"{name.lstrip('/')}.lock"))
+        except FileNotFoundError: pass
+
+    def __repr__(self):
+        return f"SharedCache({self.name!r}, maxsize={self.maxsize}, currsize={len(self)}, nbytes={self.nbytes})"
+
+def _shared_cache(maxsize):
+    """A SharedCache, or None where there is no shared memory (Pyodide, no /dev/shm)."""
+    try:
+        return SharedCache(maxsize)
+    except (ImportError, OSError):
+        return None
+
+# ── 1b. a hit under contention ───────────────────────────────────────────────
+# hit_cost is one thread. A server is many, and each tier serialises them differently:
+# lru_cache holds a lock inside C for the lookup; cachetools.cached takes the Lock you give
+# it around the lookup and around the store; diskcache is SQLite, one writer at a time
+# across every thread and process. Workers replay the "hot" trace (a 10 % cache: a third of
+# requests miss and store) for a fixed time, each op timed on its own, so p99 is one call
+# and not a batch average. Threads share one cache; processes each build their own, except
+# diskcache, whose directory they share, and SharedCache, whose segment they attach. With
+# the GIL, threads add no throughput to any tier — on a free-threaded build (python3.13t
+# and later) they can, and this shows which tiers let them.
+
+def _contention_tier(name, size, disk_dir):
+    """(call, close, close_thread) for one process: the tier's lookup-or-compute; what
+    releases what it holds — SharedCache's mapping and lock file; and what each thread
+    that called it must run before it exits — diskcache's SQLite connection is per thread,
+    and its close() only closes the caller's."""
+    def work(k): return k + 1
+    def nothing(): pass
+    if name == "dict lookup":         # the floor: every key present, nothing to evict
+        return {k: work(k) for k in range(10_000)}.__getitem__, nothing, nothing
+    if name == "functools.lru_cache":
+        return functools.lru_cache(maxsize=size)(work), nothing, nothing
+    if name == "cachetools LRUCache + Lock":
+        return cachetools.cached(cachetools.LRUCache(size), lock=threading.Lock())(work), nothing, nothing
+    if name == "diskcache.memoize":
+        import diskcache
+        dc = diskcache.Cache(disk_dir)
+        return dc.memoize()(work), dc.close, dc.close
+    if name == "SharedCache":         # contention() creates it; every thread and process attaches
+        shm = SharedCache.attach(_contention_shm(disk_dir))
+        def call(k):
+            try:
+                return shm[k]
+            except KeyError:
+                v = shm[k] = work(k); return v
+        return call, shm.close, nothing
+    raise ValueError(name)
+
+def _contention_shm(disk_dir):
+    return "cache-me-" + hashlib.blake2b(disk_dir.encode(), digest_size=6).hexdigest()
+
+CONTENTION_TIERS = ("dict lookup", "functools.lru_cache", "cachetools LRUCache + Lock", "SharedCache",
+                    "diskcache.memoize")
+
+def _drive(call, keys, offset, seconds, lat):
+    """Call through the trace from offset until seconds have passed, each op's ns into lat."""
+    n = len(keys); i = offset % n; ops = 0; clock = time.perf_counter_ns; stop = clock() + int(seconds * 1e9)
+    while True:
+        t0 = clock(); call(keys[i]); t1 = clock()
+        lat.append(t1 - t0); ops += 1; i += 1
+        if i == n: i = 0
+        if t1 >= stop: return ops
+
+def _latency(lat, ops, seconds, workers):
+    lat = sorted(lat); q = lambda p: lat[min(len(lat) - 1, int(p * len(lat)))] / 1000
+    return {"n": workers, "ops_s": ops / seconds, "p50_us": q(0.5), "p99_us": q(0.99), "max_us": lat[-1] / 1000}
+
+def _contend_threads(tier, keys, workers, seconds, size, disk_dir):
+    from array import array
+    call, close, close_thread = _contention_tier(tier, size, disk_dir)
+    try:
+        for k in keys: call(k)                               # warm: the steady state, not the fill
+        go = threading.Barrier(workers); lats = [array("q") for _ in range(workers)]; ops = [0] * workers
+        span = [[0.0, 0.0] for _ in range(workers)]
+        def worker(w):
+            try:
+                go.wait(); span[w][0] = time.perf_counter()
+                ops[w] = _drive(call, keys, w * len(keys) // workers, seconds, lats[w]); span[w][1] = time.perf_counter()
+            finally:
+                close_thread()
+        ts = [threading.Thread(target=worker, args=(w,)) for w in range(workers)]
+        for t in ts: t.start()
+        for t in ts: t.join()
+    finally:
+        close()
+    wall = max(e for _, e in span) - min(b for b, _ in span)
+    return _latency([x for a in lats for x in a], sum(ops), wall, workers)
+
+def _contend_process(tier, offset, start_at, seconds, size, disk_dir):
+    """One process's share: its own cache (diskcache's directory is shared), warmed, then
+    driven from the agreed wall-clock start. Returns (ops, latencies as bytes, start, end)."""
+    from array import array
+    keys = _trace("hot", 10_000, 30_000)[0]; call, close, _ = _contention_tier(tier, size, disk_dir)
+    try:
+        for k in keys: call(k)
+        time.sleep(max(0.0, start_at - time.time()))
+        lat = array("q"); t0 = time.time(); ops = _drive(call, keys, offset, seconds, lat)
+        return ops, lat.tobytes(), t0, time.time()
+    finally:
+        close()
+
+def _contend_processes(tier, keys, workers, seconds, size, disk_dir):
+    from array import array
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        start_at = time.time() + 1.5 + 0.2 * workers          # room for every worker to start and warm
+        futs = [pool.submit(_contend_process, tier, w * len(keys) // workers, start_at, seconds, size, disk_dir)
+                for w in range(workers)]
+        done = [f.result() for f in futs]
+    lat = array("q")
+    for d in done: lat.frombytes(d[1])
+    # over the span they actually ran together: a worker that started late must not count double
+    return _latency(lat, sum(d[0] for d in done), max(d[3] for d in done) - min(d[2] for d in done), workers)
+
+def contention(threads=(1, 2, 4, 8), processes=(1, 2, 4), seconds=0.3, tiers=CONTENTION_TIERS):
+    """Aggregate ops/s and per-op p50/p99 for each tier as workers are added — threads sharing
+    one cache, then processes. processes is None under Pyodide and wherever no pool can be
+    made or its workers cannot run (processes_unavailable says why)."""
+    from concurrent.futures import BrokenExecutor
+    size = 1000; keys = _trace("hot", 10_000, 30_000)[0]
+    tmp = tempfile.mkdtemp(prefix="cache-me-contention-"); out = {}
+    shm = None
+    try:
+        for tier in tiers:
+            if tier == "SharedCache":
+                try:
+                    shm = SharedCache(size, _contention_shm(tmp))
+                except (ImportError, OSError):
+                    continue
+            out[tier] = {"threads": [_contend_threads(tier, keys, int(w), float(seconds), size, tmp) for w in threads]}
+            if sys.platform == "emscripten":
+                out[tier]["processes"] = None; continue
+            try:
+                out[tier]["processes"] = [_contend_processes(tier, keys, int(w), float(seconds), size, tmp)
+                                          for w in processes]
+            except (OSError, NotImplementedError, ImportError, BrokenExecutor) as e:  # no sem_open, no fork
+                out[tier]["processes"] = None; out[tier]["processes_unavailable"] = f"{type(e).__name__}: {e}"
+    finally:
+        if shm is not None: shm.unlink()
+        shutil.rmtree(tmp, ignore_errors=True)
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    return json.dumps({"python": sys.version.split()[0], "gil": gil, "cores": os.cpu_count(), "seconds": float(seconds),
+                       "cache_size": size, "pattern": "hot", "results": out})
 
 # ── 2. which policy, on which pattern ────────────────────────────────────────
 
@@ -105,42 +471,349 @@ def requests(pattern, universe=10_000, n=30_000, seed=7):
         return out + hot[len(out):]
     raise ValueError(pattern)
 
-def _replay(c, seq):
+def _hits(c, seq):
     hits = 0; get = c.__getitem__
     for k in seq:
         try:
             get(k); hits += 1
         except KeyError:
             c[k] = 1
-    return hits / len(seq)
-
-def _optimal(seq, size):
-    """Belady's offline MIN — evict whatever is needed furthest in the future. The ceiling."""
-    INF = 1 << 60; nxt = [0] * len(seq); last = {}
-    for i in range(len(seq) - 1, -1, -1):
-        nxt[i] = last.get(seq[i], INF); last[seq[i]] = i
-    cache = {}; heap = []; hits = 0
-    for i, k in enumerate(seq):
-        if k in cache:
-            hits += 1
-        elif len(cache) >= size:
-            while True:
-                nu, ek = heapq.heappop(heap)
-                if ek in cache and cache[ek] == -nu:
-                    del cache[ek]; break
-        cache[k] = nxt[i]; heapq.heappush(heap, (-nxt[i], k))
-    return hits / len(seq)
+    return hits
+
+def _replay(c, seq):
+    return _hits(c, seq) / len(seq)
+
+def requests_array(pattern, universe=10_000, n=30_000, seed=7):
+    """requests() as an int64 NumPy array, drawn without a Python step per request — for
+    traces of 10^7 and more. The same patterns from NumPy's generator: deterministic, but not
+    the keys requests() gives, whose stream the page and the survey's native run share."""
+    import numpy as np
+    rng = np.random.default_rng(seed); universe = int(universe); n = int(n)
+    if pattern == "uniform":
+        return rng.integers(0, universe, n, dtype=np.int64)
+    if pattern == "loop":
+        return np.arange(n, dtype=np.int64) % universe
+    cdf = np.cumsum(1.0 / np.arange(1, universe + 1)); cdf /= cdf[-1]      # Zipf, s = 1
+    def draw(pop, m):
+        return pop[np.minimum(np.searchsorted(cdf, rng.random(m), side="right"), universe - 1)]
+    hot = draw(rng.permutation(universe).astype(np.int64), n)
+    if pattern == "hot":
+        return hot
+    if pattern == "hot+scan":
+        i = np.arange(n, dtype=np.int64)
+        return np.where(i % 4 != 0, hot, (i // 4) % universe)
+    if pattern == "shift":
+        third = n // 3
+        return np.concatenate([draw(rng.permutation(universe).astype(np.int64), third) for _ in range(3)]
+                              + [hot[3 * third:]])
+    raise ValueError(pattern)
+
+def next_use(seq):
+    """For each request, the position of the next request for the same key — len(seq) if
+    there is none. A list gives a list; an array is done in NumPy, a stable argsort putting
+    each key's requests side by side in order, so its successor is the next one along."""
+    n = len(seq)
+    if isinstance(seq, list):
+        nxt = [n] * n; last = {}
+        for i in range(n - 1, -1, -1):
+            nxt[i] = last.get(seq[i], n); last[seq[i]] = i
+        return nxt
+    import numpy as np
+    order = np.argsort(seq, kind="stable"); same = seq[order[1:]] == seq[order[:-1]]
+    nxt = np.full(n, n, dtype=np.int64); nxt[order[:-1][same]] = order[1:][same]
+    return nxt
+
+def _optimal(seq, size, nxt=None):
+    """Belady's offline MIN — evict whatever is needed furthest in the future. The ceiling.
+
+    seq is a list or an int64 array; pass nxt = next_use(seq) if you have it. The max-heap
+    holds one int per cached entry and no key: the position of the key's next request, or
+    n + the position of its last one when there is none — either way seq[e % n] is the key.
+    Entries go stale when their key is hit; the heap is rebuilt from the live ones whenever
+    it outgrows twice the cache, so memory is the cache's and not the trace's.
+
+    The heap stays a list under heapq rather than an array('q'): about 40 bytes an entry
+    instead of 8, but at most 2 × size + 64 entries — 80 KB for a 1,000-entry cache —
+    and heapq sifts in C, where hand-written sifts over an array run about ten times
+    slower. On a 10^7-request trace the memory is seq and nxt (8 bytes a request each,
+    as int64 arrays) plus one 2^20-request chunk of each as lists, not the heap."""
+    n = len(seq); nxt = next_use(seq) if nxt is None else nxt; lst = isinstance(seq, list)
+    key = seq.__getitem__ if lst else (lambda p: int(seq[p]))
+    cache = {}; heap = []; hits = 0; push = heapq.heappush; pop = heapq.heappop; chunk = 1 << 20
+    for start in range(0, n, chunk):
+        ks = seq[start:start + chunk]; ns = nxt[start:start + chunk]
+        if not lst: ks = ks.tolist(); ns = ns.tolist()
+        for i, k, nu in zip(range(start, start + chunk), ks, ns):
+            e = nu if nu < n else n + i
+            if k in cache:
+                hits += 1
+            elif len(cache) >= size:
+                while True:
+                    top = -pop(heap); ek = key(top % n)
+                    if cache.get(ek) == top:
+                        del cache[ek]; break
+            cache[k] = e; push(heap, -e)
+            if len(heap) > 2 * size + 64:
+                heap = [-v for v in cache.values()]; heapq.heapify(heap)
+    return hits / n
+
+_TRACES = OrderedDict()        # (pattern, universe, n, seed) -> (seq, nxt, distinct), oldest first
+_TRACE_BUDGET = 2_000_000      # requests kept across all of them: two lists of ints each, ~16 B a request
+
+def _trace(pattern, universe, n, seed=7):
+    """requests(), its next_use() and its distinct keys, kept for the last few traces. On the
+    page only the cache size moves between calls, and generating the trace and its next-use
+    positions costs more than replaying it. The memo is bounded by requests held, not by
+    traces: a page-sized trace is 30,000, but one can be 10^7, and the newest is always kept
+    — so a large one costs no more than itself. Callers must not modify what they get back."""
+    k = (pattern, universe, n, seed)
+    if k in _TRACES:
+        _TRACES.move_to_end(k); return _TRACES[k]
+    seq = requests(pattern, universe, n, seed)
+    out = _TRACES[k] = seq, next_use(seq), len(set(seq))
+    held = sum(len(t[0]) for t in _TRACES.values())
+    while held > _TRACE_BUDGET and len(_TRACES) > 1:
+        held -= len(_TRACES.popitem(last=False)[1][0])
+    return out
+
+def ceiling(pattern, cache_pct=10, universe=10_000, n=10_000_000, seed=7):
+    """The offline optimum on a trace far longer than the page's: requests_array() and
+    next_use() in NumPy, then Belady over the array. Seconds for each step."""
+    universe = int(universe); n = int(n); size = max(1, int(universe * float(cache_pct) / 100))
+    t0 = time.perf_counter(); seq = requests_array(pattern, universe, n, seed)
+    t1 = time.perf_counter(); nxt = next_use(seq)
+    t2 = time.perf_counter(); h = _optimal(seq, size, nxt); t3 = time.perf_counter()
+    return json.dumps({"pattern": pattern, "universe": universe, "n": n, "cache_size": size,
+                       "cache_pct": float(cache_pct), "hit_rate": h,
+                       "seconds": {"trace": t1 - t0, "next_use": t2 - t1, "optimal": t3 - t2}})
+
+# ── 2a. the policies cachetools doesn't ship ─────────────────────────────────
+# Drop-in caches like cachetools' own: a MutableMapping with a maxsize, where __getitem__ is
+# a use (a KeyError is a miss) and __setitem__ after a miss may evict — the protocol of
+# _replay and of cachetools.cached. `in` is not a use. Each is the published algorithm,
+# written for reading rather than speed; they are what LRU is not — scan-resistant
+# (2Q, ARC, S3-FIFO, SIEVE keep a key seen once from displacing keys seen twice) and
+# frequency-aware without LFU's memory of yesterday (W-TinyLFU's sketch ages).
+
+class _Policy(MutableMapping):
+    def __init__(self, maxsize):
+        self.maxsize = int(maxsize); self._data = {}
+    def __len__(self): return len(self._data)
+    def __iter__(self): return iter(self._data)
+    def __contains__(self, key): return key in self._data
+    def __repr__(self): return f"{type(self).__name__}(maxsize={self.maxsize}, currsize={len(self._data)})"
+
+class SIEVE(_Policy):
+    """SIEVE (Zhang et al., NSDI '24): a FIFO queue and a visited bit. A hit sets the bit and
+    moves nothing; a hand walks from the oldest entry toward the newest, clearing bits, and
+    evicts the first unvisited one — then stays there for next time."""
+    # a node is [key, value, visited, newer, older]
+    def __init__(self, maxsize):
+        super().__init__(maxsize); self._head = self._tail = self._hand = None
+    def __getitem__(self, key):
+        n = self._data[key]; n[2] = True; return n[1]
+    def __setitem__(self, key, value):
+        n = self._data.get(key)
+        if n is not None: n[1] = value; return
+        if len(self._data) >= self.maxsize: self._evict()
+        n = [key, value, False, None, self._head]
+        if self._head is None: self._tail = n
+        else: self._head[3] = n
+        self._head = n; self._data[key] = n
+    def __delitem__(self, key): self._unlink(self._data[key])
+    def _evict(self):
+        o = self._hand or self._tail
+        while o[2]:
+            o[2] = False; o = o[3] or self._tail
+        self._hand = o[3]; self._unlink(o)
+    def _unlink(self, n):
+        newer, older = n[3], n[4]
+        if newer is None: self._head = older
+        else: newer[4] = older
+        if older is None: self._tail = newer
+        else: older[3] = newer
+        if self._hand is n: self._hand = newer
+        del self._data[n[0]]
+
+class S3FIFO(_Policy):
+    """S3-FIFO (Yang et al., SOSP '23): a small FIFO (10 %) that new keys must survive, a main
+    FIFO with reinsertion while a 2-bit frequency lasts, and a ghost FIFO of keys recently
+    dropped from the small one, which go straight to main when they return."""
+    def __init__(self, maxsize):
+        super().__init__(maxsize); self._scap = max(1, self.maxsize // 10); self._mcap = self.maxsize - self._scap
+        self._small = OrderedDict(); self._main = OrderedDict(); self._ghost = OrderedDict(); self._freq = {}
+    def __getitem__(self, key):
+        v = self._data[key]; self._freq[key] = min(self._freq[key] + 1, 3); return v
+    def __setitem__(self, key, value):
+        if key in self._data: self._data[key] = value; return
+        while len(self._data) >= self.maxsize:
+            if len(self._small) >= self._scap or not self._main: self._evict_small()
+            else: self._evict_main()
+        if key in self._ghost: del self._ghost[key]; self._main[key] = None
+        else: self._small[key] = None
+        self._data[key] = value; self._freq[key] = 0
+    def __delitem__(self, key):
+        del self._data[key]; del self._freq[key]
+        (self._small if key in self._small else self._main).pop(key)
+    def _evict_small(self):
+        while self._small:
+            key, _ = self._small.popitem(last=False)
+            if self._freq[key] > 1:
+                self._main[key] = None
+                if len(self._main) > self._mcap: self._evict_main()
+            else:
+                del self._data[key]; del self._freq[key]; self._ghost[key] = None
+                if len(self._ghost) > self._mcap: self._ghost.popitem(last=False)
+                return
+    def _evict_main(self):
+        while self._main:
+            key, _ = self._main.popitem(last=False); f = self._freq[key]
+            if f: self._freq[key] = f - 1; self._main[key] = None
+            else: del self._data[key]; del self._freq[key]; return
+
+class TwoQ(_Policy):
+    """2Q (Johnson & Shasha, VLDB '94), the full version: a FIFO (a quarter of the cache) that
+    a first request lands in and a re-hit inside does not leave, a ghost list of keys pushed
+    out of it (half the cache's worth), and an LRU for keys requested again after that."""
+    def __init__(self, maxsize):
+        super().__init__(maxsize); self._kin = max(1, self.maxsize // 4); self._kout = max(1, self.maxsize // 2)
+        self._a1in = OrderedDict(); self._a1out = OrderedDict(); self._am = OrderedDict()
+    def __getitem__(self, key):
+        v = self._data[key]
+        if key in self._am: self._am.move_to_end(key)
+        return v
+    def __setitem__(self, key, value):
+        if key in self._data: self._data[key] = value; return
+        if len(self._data) >= self.maxsize:
+            if len(self._a1in) > self._kin or not self._am:
+                old, _ = self._a1in.popitem(last=False); self._a1out[old] = None
+                if len(self._a1out) > self._kout: self._a1out.popitem(last=False)
+            else:
+                old, _ = self._am.popitem(last=False)
+            del self._data[old]
+        if key in self._a1out: del self._a1out[key]; self._am[key] = None
+        else: self._a1in[key] = None
+        self._data[key] = value
+    def __delitem__(self, key):
+        del self._data[key]; (self._am if key in self._am else self._a1in).pop(key)
+
+class ARC(_Policy):
+    """ARC (Megiddo & Modha, FAST '03): an LRU of keys seen once (T1) and one of keys seen
+    again (T2), each shadowed by a ghost list of what it evicted (B1, B2). A hit in a ghost
+    list says that side was given too little room, and moves the target split p."""
+    def __init__(self, maxsize):
+        super().__init__(maxsize); self._p = 0.0
+        self._t1, self._t2, self._b1, self._b2 = OrderedDict(), OrderedDict(), OrderedDict(), OrderedDict()
+    def __getitem__(self, key):
+        v = self._data[key]
+        if key in self._t1: del self._t1[key]; self._t2[key] = None
+        else: self._t2.move_to_end(key)
+        return v
+    def __setitem__(self, key, value):
+        if key in self._data: self._data[key] = value; return
+        c = self.maxsize; t1, t2, b1, b2 = self._t1, self._t2, self._b1, self._b2
+        if key in b1:
+            self._p = min(c, self._p + max(len(b2) / len(b1), 1)); self._replace(False)
+            del b1[key]; t2[key] = None
+        elif key in b2:
+            self._p = max(0.0, self._p - max(len(b1) / len(b2), 1)); self._replace(True)
+            del b2[key]; t2[key] = None
+        else:
+            if len(t1) + len(b1) >= c:
+                if len(t1) < c: b1.popitem(last=False); self._replace(False)
+                else: old, _ = t1.popitem(last=False); del self._data[old]
+            elif len(t1) + len(t2) + len(b1) + len(b2) >= c:
+                if len(t1) + len(t2) + len(b1) + len(b2) >= 2 * c: b2.popitem(last=False)
+                self._replace(False)
+            t1[key] = None
+        self._data[key] = value
+    def __delitem__(self, key):
+        del self._data[key]; (self._t1 if key in self._t1 else self._t2).pop(key)
+    def _replace(self, in_b2):
+        t1, t2 = self._t1, self._t2
+        if len(t1) + len(t2) < self.maxsize: return
+        if t1 and (len(t1) > self._p or (in_b2 and len(t1) == self._p) or not t2):
+            old, _ = t1.popitem(last=False); self._b1[old] = None
+        else:
+            old, _ = t2.popitem(last=False); self._b2[old] = None
+        del self._data[old]
+
+_M64 = (1 << 64) - 1
+_ROW_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+def _stable_hash(key):
+    """hash() without the per-process salt str and bytes carry, so admission decisions — and
+    the hit rates they make — come out the same run to run. An int hashes to itself anyway."""
+    if type(key) is int: return key & _M64
+    b = key.encode("utf-8", "surrogatepass") if isinstance(key, str) else \
+        key if isinstance(key, bytes) else repr(key).encode("utf-8", "surrogatepass")
+    return int.from_bytes(hashlib.blake2b(b, digest_size=8).digest(), "little")
+
+class _Sketch:
+    """TinyLFU's frequency estimate: a count-min sketch, four rows of 4-bit counters, that
+    halves every counter after 10 × maxsize increments so old popularity fades."""
+    def __init__(self, maxsize):
+        bits = max(4, (2 * maxsize - 1).bit_length()); self._shift = 64 - bits
+        self._rows = [bytearray(1 << bits) for _ in _ROW_SEEDS]; self._sample = 10 * maxsize; self._n = 0
+    def add(self, key):
+        h = _stable_hash(key); s = self._shift
+        for row, a in zip(self._rows, _ROW_SEEDS):
+            i = (h * a & _M64) >> s
+            if row[i] < 15: row[i] += 1
+        self._n += 1
+        if self._n >= self._sample:
+            self._n //= 2; self._rows = [bytearray(x >> 1 for x in row) for row in self._rows]
+    def estimate(self, key):
+        h = _stable_hash(key); s = self._shift
+        return min(row[(h * a & _M64) >> s] for row, a in zip(self._rows, _ROW_SEEDS))
+
+class WTinyLFU(_Policy):
+    """W-TinyLFU (Einziger, Friedman & Manes, 2017; Caffeine's policy): a 1 % LRU window in
+    front of a segmented LRU (probation, and protected at 80 %). A key leaving the window
+    gets into the main cache only if the sketch says it is requested more often than the
+    key it would evict. Every __getitem__, hit or miss, counts in the sketch."""
+    def __init__(self, maxsize):
+        super().__init__(maxsize); self._wcap = max(1, self.maxsize // 100)
+        self._maincap = self.maxsize - self._wcap; self._pcap = self._maincap * 4 // 5
+        self._window = OrderedDict(); self._probation = OrderedDict(); self._protected = OrderedDict()
+        self._sketch = _Sketch(self.maxsize)
+    def __getitem__(self, key):
+        self._sketch.add(key); v = self._data[key]
+        if key in self._window: self._window.move_to_end(key)
+        elif key in self._protected: self._protected.move_to_end(key)
+        else:
+            del self._probation[key]; self._protected[key] = None
+            if len(self._protected) > self._pcap:
+                old, _ = self._protected.popitem(last=False); self._probation[old] = None
+        return v
+    def __setitem__(self, key, value):
+        if key in self._data: self._data[key] = value; return
+        self._data[key] = value; self._window[key] = None
+        if len(self._window) <= self._wcap: return
+        cand, _ = self._window.popitem(last=False)
+        if len(self._probation) + len(self._protected) < self._maincap:
+            self._probation[cand] = None; return
+        q = self._probation or self._protected; victim = next(iter(q), None)
+        if victim is not None and self._sketch.estimate(cand) > self._sketch.estimate(victim):
+            del q[victim]; del self._data[victim]; self._probation[cand] = None
+        else:
+            del self._data[cand]
+    def __delitem__(self, key):
+        del self._data[key]
+        for q in (self._window, self._probation, self._protected):
+            if key in q: del q[key]; return
 
 POLICIES = {"LRU": cachetools.LRUCache, "LFU": cachetools.LFUCache,
-            "FIFO": cachetools.FIFOCache, "random (RR)": cachetools.RRCache}
+            "FIFO": cachetools.FIFOCache, "random (RR)": cachetools.RRCache,
+            "W-TinyLFU": WTinyLFU, "ARC": ARC, "2Q": TwoQ, "S3-FIFO": S3FIFO, "SIEVE": SIEVE}
 
 def policies(pattern, cache_pct=10, universe=10_000, n=30_000):
     """Hit rate per eviction policy when a cache holding cache_pct % of the keys replays n
-    requests of the given pattern — each policy is cachetools' own class, plus the stdlib's
-    lru_cache and the offline optimum."""
+    requests of the given pattern — cachetools' own classes, the policies above, the
+    stdlib's lru_cache and the offline optimum."""
     universe = int(universe); n = int(n)
     size = max(1, int(universe * float(cache_pct) / 100))
-    seq = requests(pattern, universe, n)
+    seq, nxt, distinct = _trace(pattern, universe, n)
     out = {}
     for name, cls in POLICIES.items():
         t0 = time.perf_counter(); h = _replay(cls(size), seq); dt = time.perf_counter() - t0
@@ -151,12 +824,142 @@ def policies(pattern, cache_pct=10, universe=10_000, n=30_000):
     for k in seq: f(k)
     ci = f.cache_info()
     out["functools.lru_cache"] = {"hit_rate": ci.hits / len(seq), "ms": (time.perf_counter() - t0) * 1000}
-    out["optimal (offline)"] = {"hit_rate": _optimal(seq, size), "ms": None}
-    distinct = len(set(seq))
+    out["optimal (offline)"] = {"hit_rate": _optimal(seq, size, nxt), "ms": None}
     return json.dumps({"pattern": pattern, "description": PATTERNS[pattern], "universe": universe,
                        "distinct_requested": distinct, "n": n, "cache_size": size, "cache_pct": float(cache_pct),
                        "results": out})
 
+# ── 2b. your own traffic ─────────────────────────────────────────────────────
+# A Zipf draw is a guess at your traffic; a log of it is not. A trace streams from a file —
+# one key per line, or JSONL with the key at a dotted path — or from workshop's own API-log
+# sample ("json_logs", "json_logs@64M"), keyed on http.path or req_id. It is read in
+# chunks and every policy replays each chunk in turn, so 10^8 requests cost one read of the
+# file and memory for the caches, not for the trace. The offline optimum needs the whole
+# future in memory; it stays with the synthetic patterns.
+
+def _trace_lines(trace):
+    if trace.split("@")[0] == "json_logs":
+        buf = _sample("json_logs", trace.partition("@")[2] or None).obj     # the mmap itself
+        pos = 0; end = len(buf)
+        while pos < end:
+            nl = buf.find(b"\n", pos); nl = end if nl < 0 else nl + 1
+            yield buf[pos:nl]; pos = nl
+        return
+    with (gzip.open if trace.endswith(".gz") else open)(trace, "rb") as f:
+        yield from f
+
+def trace_keys(trace, key=None, fmt=None, limit=None):
+    """The keys of a trace, lazily: each line's key, or None for a line without one (blank,
+    not JSON, no such field). fmt is "lines" or "jsonl" — by default, jsonl for .jsonl and
+    .ndjson files (gzipped or not) and for json_logs, whose key defaults to http.path."""
+    sample = trace.split("@")[0] == "json_logs"
+    if fmt is None:
+        fmt = "jsonl" if sample or trace.removesuffix(".gz").endswith((".jsonl", ".ndjson")) else "lines"
+    if fmt == "jsonl":
+        path = (key or ("http.path" if sample else "")).split(".")
+        if path == [""]: raise ValueError("a JSONL trace needs key=, a dotted path such as http.path")
+    elif fmt != "lines":
+        raise ValueError(fmt)
+    n = 0
+    for line in _trace_lines(trace):
+        if limit is not None and n >= limit: return
+        n += 1
+        if fmt == "lines":
+            k = line.strip(); yield k.decode("utf-8", "replace") if k else None; continue
+        try:
+            v = json.loads(line)
+            for p in path: v = v[p]
+        except (ValueError, KeyError, TypeError, IndexError):
+            yield None; continue
+        yield json.dumps(v, sort_keys=True) if isinstance(v, (dict, list)) else v
+
+def replay(trace, cache_size=10_000, key=None, fmt=None, limit=None, chunk=65_536):
+    """Hit rate per eviction policy — POLICIES, plus the stdlib's lru_cache — replaying a
+    real trace (see trace_keys) through caches of cache_size entries, in constant memory."""
+    size = int(cache_size); caches = {name: cls(size) for name, cls in POLICIES.items()}
+    hits = dict.fromkeys(caches, 0); ms = dict.fromkeys(caches, 0.0); ms["functools.lru_cache"] = 0.0
+    @functools.lru_cache(maxsize=size)
+    def f(k): return k
+    n = skipped = 0; T0 = time.perf_counter(); keys = trace_keys(trace, key, fmt, limit)
+    while True:
+        batch = []
+        for k in keys:
+            if k is None: skipped += 1; continue
+            batch.append(k)
+            if len(batch) >= chunk: break
+        if not batch: break
+        n += len(batch)
+        for name, c in caches.items():
+            t0 = time.perf_counter(); hits[name] += _hits(c, batch); ms[name] += (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        for k in batch: f(k)
+        ms["functools.lru_cache"] += (time.perf_counter() - t0) * 1000
+    hits["functools.lru_cache"] = f.cache_info().hits
+    return json.dumps({"trace": trace, "key": key, "n": n, "skipped": skipped, "cache_size": size,
+                       "seconds": time.perf_counter() - T0,
+                       "results": {name: {"hit_rate": hits[name] / n if n else None, "ms": ms[name]} for name in ms}})
+
+# ── 2c. every cache size at once ─────────────────────────────────────────────
+# LRU has the stack property: a cache of size c holds exactly the c most recently used keys,
+# so a request hits every LRU cache larger than its stack distance — the number of distinct
+# keys touched since its key was last — and one pass that records the distances gives the
+# hit rate at every size (Mattson et al., 1970). The distance is a count of "latest use"
+# marks after the key's previous one, a Fenwick-tree prefix sum: O(log d) per request.
+# SHARDS (Waldspurger et al., FAST '15) keeps only keys whose hash falls under rate — the
+# same keys every time they appear — and scales their distances by 1/rate; at 1 % the
+# curve is usually within a point or two, and memory and time are 1 % of the exact pass.
+
+def _shards(k, threshold):
+    return int.from_bytes(hashlib.blake2b(str(k).encode(), digest_size=8).digest(), "little") < threshold
+
+def _distances(keys, rate=1.0):
+    """One pass: ({stack distance: requests}, requests seen, requests sampled, cold misses)."""
+    hist = {}; last = {}; cap = 1 << 16; tree = [0] * (cap + 1); t = 0; n = sampled = 0
+    threshold = int(rate * (1 << 64))
+    for k in keys:
+        n += 1
+        if rate < 1 and not _shards(k, threshold): continue
+        sampled += 1
+        if t >= cap:                  # positions run out: renumber the live marks 1..D
+            order = sorted(last, key=last.__getitem__); cap = max(cap, 2 * len(order))
+            tree = [0] * (cap + 1)
+            for i, key in enumerate(order, 1): last[key] = i; tree[i] = 1
+            for i in range(1, cap + 1):
+                j = i + (i & -i)
+                if j <= cap: tree[j] += tree[i]
+            t = len(order)
+        t += 1
+        p = last.get(k)
+        if p is not None:
+            i = p; before = 0         # marks at or before p; the rest came after it
+            while i: before += tree[i]; i &= i - 1
+            d = len(last) - before + 1; hist[d] = hist.get(d, 0) + 1
+            i = p
+            while i <= cap: tree[i] -= 1; i += i & -i
+        last[k] = t; i = t
+        while i <= cap: tree[i] += 1; i += i & -i
+    return hist, n, sampled, len(last)
+
+def mrc(source, sizes=20, universe=10_000, n=30_000, rate=1.0, key=None, fmt=None, limit=None):
+    """LRU hit rate against cache size, every size from one pass. source is one of PATTERNS
+    (with universe and n) or a trace, as replay() takes. sizes is a list of cache sizes, or
+    a count of evenly spaced ones up to the distinct keys requested. rate < 1 samples
+    keys SHARDS-style (with its -adj correction, which credits the unsampled share of the
+    requests to the smallest distance) for traces too big to track every key of."""
+    rate = float(rate); T0 = time.perf_counter()
+    keys = _trace(source, int(universe), int(n))[0] if source in PATTERNS else trace_keys(source, key, fmt, limit)
+    hist, total, sampled, cold = _distances((k for k in keys if k is not None), rate)
+    distinct = round(cold / rate)
+    if isinstance(sizes, int):
+        sizes = sorted({max(1, round(distinct * i / sizes)) for i in range(1, sizes + 1)})
+    expected = total * rate; adj = expected - sampled
+    dists = sorted(hist); curve = []; j = 0; hits = 0
+    for c in sorted(int(x) for x in sizes):
+        while j < len(dists) and dists[j] / rate <= c: hits += hist[dists[j]]; j += 1
+        curve.append({"size": c, "hit_rate": max(0.0, min(1.0, (hits + adj) / expected)) if expected else None})
+    return json.dumps({"source": source, "n": total, "sampled": sampled, "rate": rate, "distinct": distinct,
+                       "curve": curve, "seconds": time.perf_counter() - T0})
+
 def belady_anomaly():
     """The textbook sequence on which FIFO misses MORE with a bigger cache — run through
     cachetools' own FIFOCache and LRUCache."""
@@ -168,18 +971,167 @@ def belady_anomaly():
 
 # ── 3. does it pay ───────────────────────────────────────────────────────────
 
-def payoff(fn_us, hit_rate, hit_us, store_us):
+def payoff(fn_us, hit_rate, hit_us, store_us, in_flight=0, coalesce=True):
     """Mean µs per call with the cache against without, and the hit rate at which the cache
-    breaks even — the arithmetic the page, the notebook and the survey all use."""
+    breaks even — the arithmetic the page, the notebook and the survey all use. in_flight is
+    how many more requests for a key arrive while its miss is still computing (arrival rate
+    × fn time; a burst's size less one). A simulated hit_rate counts them as hits, since it
+    stores instantly; uncoalesced, each is really one more miss, backend call and store;
+    coalesced (amemoize), it waits on average half the computation instead. backend_load is
+    backend calls per request, 1.0 uncached; breakeven_hit_rate is for in_flight=0."""
     fn_us = float(fn_us); h = float(hit_rate); hit_us = float(hit_us); store_us = float(store_us)
-    with_cache = h * hit_us + (1 - h) * (fn_us + store_us)
+    m = 1 - h
+    piggy = m * min(float(in_flight), h / m) if m > 0 else 0.0    # hits that are in-flight misses
+    if coalesce:
+        with_cache = (h - piggy) * hit_us + m * (fn_us + store_us) + piggy * (hit_us + fn_us / 2)
+        backend = m
+    else:
+        with_cache = (h - piggy) * hit_us + (m + piggy) * (fn_us + store_us)
+        backend = m + piggy
     # pays when h*hit + (1-h)*(fn+store) < fn  ⇔  h > store / (fn + store - hit)
     denom = fn_us + store_us - hit_us
     breakeven = store_us / denom if denom > 0 else None
     if breakeven is not None and breakeven > 1: breakeven = None          # never pays
     return json.dumps({"fn_us": fn_us, "hit_rate": h, "without_us": fn_us, "with_us": with_cache,
                        "speedup": fn_us / with_cache if with_cache else None,
-                       "breakeven_hit_rate": breakeven})
+                       "breakeven_hit_rate": breakeven, "in_flight": float(in_flight),
+                       "coalesce": bool(coalesce), "backend_load": backend})
+
+# ── 3a. a cold key under a burst ─────────────────────────────────────────────
+# payoff() prices one caller at a time. An asyncio server has hundreds in flight, and a key
+# that is cold — never cached, or just expired — misses for every request that arrives
+# before the first has stored it: 200 concurrent requests, 200 backend calls (a cache
+# stampede). amemoize puts three things on top of any cachetools-style mapping.
+# Single-flight: one task computes a missing key and every other caller awaits its future.
+# Stale-while-revalidate: for stale_ttl past expiry the old value is served while one
+# background task refreshes it. Probabilistic early expiry (XFetch — Vattani et al., VLDB
+# 2015): a hit refreshes in the background with a probability that rises as expiry nears,
+# scaled by how long the value took to compute, so a hot key is renewed before anyone
+# sees it expire. Expiry is the entry's own stamp, so the mapping only decides capacity.
+
+def amemoize(cache=None, ttl=None, stale_ttl=0.0, beta=1.0, key=cachetools.keys.hashkey, coalesce=True,
+             timer=time.monotonic):
+    """Decorator for an async function: results go into cache — any MutableMapping: a
+    cachetools policy, one of POLICIES, a SharedCache; default LRUCache(1024) — fresh for
+    ttl seconds (None: until evicted). beta=0 turns early expiry off, coalesce=False
+    single-flight. The wrapper's .stats counts calls, hits, early refreshes started, stale
+    serves, coalesced waits, misses, backend calls and background errors; .cache is the
+    mapping."""
+    cache = cachetools.LRUCache(1024) if cache is None else cache
+    ttl = None if ttl is None else float(ttl); stale_ttl = float(stale_ttl); beta = float(beta)
+    def deco(fn):
+        flights, background = {}, set()
+        stats = dict.fromkeys(("calls", "hits", "early", "stale", "coalesced", "misses", "backend", "errors"), 0)
+        async def compute(k, args, kwargs):
+            stats["backend"] += 1; t0 = timer()
+            v = await fn(*args, **kwargs)
+            now = timer()
+            try:
+                cache[k] = (v, None if ttl is None else now + ttl, now - t0)
+            except ValueError:                 # too large for this cache: still answer
+                pass
+            return v
+        def flight(k, args, kwargs):
+            f = flights.get(k)
+            if f is None:
+                f = flights[k] = asyncio.ensure_future(compute(k, args, kwargs))
+                f.add_done_callback(lambda _, k=k: flights.pop(k, None))
+            return f
+        def settled(t):                        # retrieve the exception, or asyncio logs it
+            background.discard(t)
+            if not t.cancelled() and t.exception() is not None: stats["errors"] += 1
+        def refresh(k, args, kwargs):          # always single-flight, even with coalesce=False
+            if k in flights: return False
+            t = flight(k, args, kwargs); background.add(t); t.add_done_callback(settled)
+            return True
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            stats["calls"] += 1; k = key(*args, **kwargs)
+            try:
+                v, expires, delta = cache[k]
+            except KeyError:
+                expires = False
+            if expires is not False:
+                now = timer()
+                if expires is None or now < expires:
+                    # XFetch: refresh once now - delta·beta·ln(u) passes expiry, u ∈ (0, 1]
+                    # a draw that lands while a refresh is already in flight is a plain hit
+                    if beta and expires is not None and \
+                            now - delta * beta * math.log(1.0 - random.random()) >= expires and \
+                            refresh(k, args, kwargs):
+                        stats["early"] += 1
+                    else:
+                        stats["hits"] += 1
+                    return v
+                if now < expires + stale_ttl:
+                    stats["stale"] += 1; refresh(k, args, kwargs); return v
+            if not coalesce:
+                stats["misses"] += 1; return await compute(k, args, kwargs)
+            stats["coalesced" if k in flights else "misses"] += 1
+            # shielded: a caller that is cancelled leaves the computation to the others
+            return await asyncio.shield(flight(k, args, kwargs))
+        wrapper.cache = cache; wrapper.stats = stats
+        return wrapper
+    return deco
+
+STAMPEDE_VARIANTS = {"plain (check, await, store)": {"coalesce": False, "beta": 0.0},
+                     "single-flight": {"beta": 0.0},
+                     "single-flight + stale-while-revalidate": {"beta": 0.0, "stale": 10.0},
+                     "single-flight + early expiry (XFetch)": {"beta": 1.0}}
+
+async def _burst(f, n, loop):
+    lat = []
+    async def one():
+        t0 = loop.time(); await f(0); lat.append(loop.time() - t0)
+    await asyncio.gather(*(one() for _ in range(n)))
+    return lat
+
+async def _steady(f, rate, seconds, loop):
+    lat, tasks = [], []; tick = 0.01; per = max(1, round(rate * tick))
+    async def one():
+        t0 = loop.time(); await f(0); lat.append(loop.time() - t0)
+    end = loop.time() + seconds
+    while loop.time() < end:
+        tasks += [asyncio.ensure_future(one()) for _ in range(per)]
+        await asyncio.sleep(tick)
+    await asyncio.gather(*tasks)
+    return lat
+
+def _phase(lat, before, after, fn_s):
+    lat = sorted(lat); q = lambda p: lat[min(len(lat) - 1, int(p * len(lat)))] * 1000
+    d = {k: after[k] - before[k] for k in after}
+    return {"requests": len(lat), "backend_calls": d["backend"], "coalesced": d["coalesced"],
+            "stale": d["stale"], "early": d["early"], "p50_ms": q(0.5), "p99_ms": q(0.99),
+            "max_ms": lat[-1] * 1000, "waited": sum(1 for x in lat if x > fn_s / 2)}
+
+def stampede(burst=200, fn_ms=20, ttl_ms=200, rate=2000, seconds=1.0, variants=tuple(STAMPEDE_VARIANTS)):
+    """Backend calls and caller latency for each of STAMPEDE_VARIANTS: burst requests for one
+    cold key at once ("cold"); the same once it has expired ("expired"); then steady traffic,
+    rate per second for seconds on a warm key across several TTLs ("steady"), where
+    "waited" counts callers held up by the backend. The backend is asyncio.sleep(fn_ms), I/O
+    as in a handler. Runs its own event loop, so natively: not from the page. "model" is
+    payoff()'s backend_load for the cold burst, which the measured calls should match."""
+    burst = int(burst); fn_s = fn_ms / 1000; ttl = ttl_ms / 1000
+    async def run(opts):
+        loop = asyncio.get_running_loop()
+        @amemoize(cachetools.LRUCache(64), ttl=ttl, stale_ttl=ttl * opts.get("stale", 0.0),
+                  beta=opts["beta"], coalesce=opts.get("coalesce", True))
+        async def backend(k):
+            await asyncio.sleep(fn_s); return k + 1
+        out = {}
+        for phase in ("cold", "expired", "steady"):
+            if phase == "expired": await asyncio.sleep(ttl * 1.1)
+            before = dict(backend.stats)
+            lat = await (_steady(backend, rate, seconds, loop) if phase == "steady" else _burst(backend, burst, loop))
+            await asyncio.sleep(fn_s * 2)          # let background refreshes land in this phase
+            out[phase] = _phase(lat, before, backend.stats, fn_s)
+        return out
+    results = {name: asyncio.run(run(STAMPEDE_VARIANTS[name])) for name in variants}
+    model = {c: round(burst * json.loads(payoff(fn_ms * 1000, 1 - 1 / burst, 1, 1, burst - 1, c))["backend_load"], 6)
+             for c in (False, True)}
+    return json.dumps({"burst": burst, "fn_ms": fn_ms, "ttl_ms": ttl_ms, "rate": rate, "seconds": seconds,
+                       "model_cold_backend_calls": {"uncoalesced": model[False], "coalesced": model[True]},
+                       "results": results})
 
 # ── 4. memory per entry ──────────────────────────────────────────────────────
 
@@ -208,8 +1160,19 @@ def memory(n=10_000):
         s1, _ = tracemalloc.get_traced_memory(); tracemalloc.stop()
         out[label] = (s1 - s0) / n
         del obj
+    shm = _shared_cache(n + 1)
+    if shm is not None:       # fixed slots, outside the heap: the segment is the cost, full or not
+        out["SharedCache (shared memory, once for every process)"] = shm.nbytes / n; shm.unlink()
     return json.dumps({"n": n, "bytes_per_entry": out})
 
+# What the native bench (scripts/workshop_bench.py) runs: (function, args, kwargs), the
+# page's own defaults. A budget_ms kwarg is the runner's to override.
+BENCH = [("hit_cost", (), {"budget_ms": 80}), ("memory", (10_000,), {}), ("belady_anomaly", (), {})] + \
+        [("policies", (p, 10, 10_000, 30_000), {}) for p in PATTERNS] + \
+        [("replay", ("json_logs@64M", 2000), {})] + \
+        [("mrc", ("hot",), {}), ("mrc", ("json_logs@64M",), {"rate": 0.1})] + \
+        [("ceiling", ("hot+scan", 10, 10_000, 10_000_000), {}), ("contention", (), {}), ("stampede", (), {})]
+
 def versions():
     import diskcache
     return json.dumps({"python": sys.version.split()[0], "cachetools": cachetools.__version__,
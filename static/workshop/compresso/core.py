@@ -7,7 +7,7 @@ Every function the page calls returns JSON.
 import json, zlib, gzip, bz2, lzma, hashlib, sys
 import zstandard, brotli, lz4.frame
 from compression import zstd as stdzstd
-from workshop import best as _best, json_logs, random_bytes
+from workshop import best as _best, json_logs, profile as _profile, random_bytes, sample as _sample
 
 SAMPLES = {}
 CAP = 1024*1024
@@ -22,6 +22,14 @@ def init_samples():
     SAMPLES["random"] = random_bytes()
     return json.dumps({k: len(v) for k, v in SAMPLES.items()})
 
+def _data(sample):
+    # "json@64M", "random@1G": the shared samples at a size that doesn't fit in cache,
+    # mapped on first use (natively only — they are no load for a browser tab).
+    if sample not in SAMPLES and "@" in sample:
+        base, _, scale = sample.partition("@")
+        SAMPLES[sample] = _sample({"json": "json_logs", "random": "random"}[base], scale)
+    return SAMPLES[sample]
+
 _zd = zstandard.ZstdDecompressor()
 CODECS = {
     "zstandard":        (lambda d, L: zstandard.ZstdCompressor(level=L).compress(d), _zd.decompress),
@@ -34,7 +42,7 @@ CODECS = {
 }
 
 def measure(codec, level, sample, budget_ms=100):
-    data = SAMPLES[sample]; c, d = CODECS[codec]; level = int(level)
+    data = _data(sample); c, d = CODECS[codec]; level = int(level)
     out = c(data, level)
     ok = d(out) == data
     tc, rc = _best(lambda x: c(x, level), data, budget_ms/1000)
@@ -45,8 +53,23 @@ def measure(codec, level, sample, budget_ms=100):
                        "decomp_MBs": round(n/td/1e6, 1), "comp_ms": round(tc*1000, 2),
                        "decomp_ms": round(td*1000, 2), "reps": [rc, rd], "roundtrip_ok": bool(ok)})
 
+def explain(codec, level, sample, budget_ms=100):
+    """measure()'s two timings, profiled: CPU against wall, GC collections, what Python's
+    allocator saw (the codec's own C buffers it doesn't) and, where Linux permits, cycles
+    and instructions — per byte, so codecs and samples compare."""
+    data = _data(sample); c, d = CODECS[codec]; level = int(level); n = len(data)
+    out = c(data, level); res = {"codec": codec, "level": level, "sample": sample, "in": n, "out": len(out)}
+    for name, fn, arg in (("compress", lambda x: c(x, level), data), ("decompress", d, out)):
+        p = _profile(fn, arg, budget_ms/1000); perf = p["perf"]
+        res[name] = {"MBs": round(n/p["seconds"]/1e6, 1), "cpu_share": round(p["cpu_share"], 3),
+                     "gc_collections": p["gc"]["collections"], "py_peak_bytes": p["alloc"]["peak_bytes"],
+                     "cycles_per_byte": round(perf["cycles"]/n, 3) if "cycles" in perf else None,
+                     "ipc": round(perf["ipc"], 2) if perf.get("ipc") else None,
+                     "counters": None if "cycles" in perf else perf["unavailable"]}
+    return json.dumps(res)
+
 def stdlib_same(sample, level=3):
-    data = SAMPLES[sample]
+    data = _data(sample)
     a = zstandard.ZstdCompressor(level=level).compress(data); b = stdzstd.compress(data, level=level)
     return json.dumps({"identical": a == b, "bytes": len(a), "lib": ".".join(map(str, zstandard.ZSTD_VERSION)),
                        "stdlib": stdzstd.zstd_version, "python": sys.version.split()[0]})
@@ -62,6 +85,17 @@ def tiny(text):
         "bz2 (level 9)": len(bz2.compress(s)),
         "lzma (preset 6)": len(lzma.compress(s))})
 
+# What the native bench (scripts/workshop_bench.py) runs: (function, args, kwargs), the
+# page's own defaults. A budget_ms kwarg is the runner's to override.
+BENCH = [("measure", (c, L, s), {"budget_ms": 100})
+         for s in ("json", "random")
+         for c, L in (("zstandard", 3), ("compression.zstd", 3), ("brotli", 5), ("lz4", 0),
+                      ("zlib", 6), ("bz2", 9), ("lzma", 6))] + \
+        [("measure", (c, L, "json@64M"), {"budget_ms": 100})
+         for c, L in (("zstandard", 3), ("brotli", 5), ("lz4", 0), ("zlib", 6))] + \
+        [("explain", (c, L, "json"), {"budget_ms": 100}) for c, L in (("zstandard", 3), ("zlib", 6))] + \
+        [("stdlib_same", ("json", 3), {})]
+
 def versions():
     return json.dumps({"python": sys.version.split()[0], "zstandard": zstandard.__version__,
                        "libzstd": ".".join(map(str, zstandard.ZSTD_VERSION)), "brotli": brotli.__version__,
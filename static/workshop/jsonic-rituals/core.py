@@ -28,7 +28,7 @@ def numbers_obj(n=20000, seed=5):
         out.append({"t": round(t, 3), "v": round(r.gauss(50, 12), 4), "q": r.randint(0, 3), "ok": r.random() > .02})
     return {"series": "sensor-7", "points": out}
 
-_logs = [json.loads(l) for l in json_logs().decode().splitlines()]
+_logs = json.loads(b"[" + json_logs().rstrip(b"\n").replace(b"\n", b",") + b"]")   # one parse, not one per line
 SAMPLES = {"logs": _logs, "nested": nested_obj(), "numbers": numbers_obj(), "small": _logs[0]}
 
 def set_own(text):
@@ -123,6 +123,10 @@ def measure(sample, budget_ms=120):
     return json.dumps({"bytes": len(data), "rows": rows, "schema": schema, "schema_name": schema_name,
                        "schema_err": schema_err, "validation": bad})
 
+# What the native bench (scripts/workshop_bench.py) runs: (function, args, kwargs), the
+# page's own defaults. A budget_ms kwarg is the runner's to override.
+BENCH = [("measure", (s,), {"budget_ms": 120}) for s in ("logs", "nested", "numbers", "small")]
+
 def versions():
     return json.dumps({"python": sys.version.split()[0], "orjson": orjson.__version__, "msgspec": msgspec.__version__,
                        "ujson": ujson.__version__, "simplejson": simplejson.__version__})
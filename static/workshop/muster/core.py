@@ -21,18 +21,26 @@ Provenance, all read on 2026-08-21:
     — Anthropic's own reference implementation, docs.claude.com "Coordinates and
       bounding boxes" -> How Claude resizes and pads images. Copied, not reimplemented:
       the docs warn that scaling to the edge length by hand gets it wrong.
+  * resized_size_direct
+    — ours: the same answer solved from the patch grid, for the pricing path. The
+      reference stays the oracle; check_resized_size diffs the two.
   * PRICING
     — the pipeline's published cost table, and the vendors' own rates.
       Prices move; this file says so wherever it prints one.
 """
 from __future__ import annotations
 
+import collections
+import functools
 import io
 import json
 import math
+import os
+import struct
+import sys
 import time
 
-from PIL import Image, ImageOps
+from PIL import Image, ImageChops, ImageMath, ImageOps, ImageStat
 from PIL.ExifTags import IFD
 
 __version__ = "2026-08-21"
@@ -51,22 +59,68 @@ except Exception:  # pragma: no cover - absent in a plain CPython bench
 
 # ── the three local jobs: the pipeline's code, on the reader's own files ────────
 
-def _as_bytes(data):
-    """Coerce whatever the caller had into real bytes.
+def _as_buffer(data):
+    """Whatever the caller had, as something Pillow and hashlib can read in place.
 
     The one seam where the browser leaks in. Pyodide hands a JS Uint8Array to Python
     as a JsProxy, which supports no buffer protocol, so `io.BytesIO(data)` raises
-    `TypeError: a bytes-like object is required`. Converting here rather than on the
-    JS side keeps every function below callable unchanged from a native bench.
+    `TypeError: a bytes-like object is required`. That is copied out of the JS heap
+    once, here, at the boundary, and never again: bytes come back as they are, and
+    anything else with the buffer protocol (bytearray, memoryview, mmap, an array) as
+    a flat byte memoryview onto its own memory. A 12 MP photo is 4-8 MB, and every
+    function below calls this, so a copy here would be one copy per job per photo.
     """
-    if isinstance(data, (bytes, bytearray, memoryview)):
-        return bytes(data)
-    to_py = getattr(data, "to_py", None)       # pyodide.ffi.JsProxy
+    if isinstance(data, bytes):
+        return data
+    try:
+        return memoryview(data).cast("B")
+    except TypeError:                           # no buffer protocol, or not contiguous
+        pass
+    to_bytes = getattr(data, "to_bytes", None)  # pyodide.ffi.JsBuffer: one copy
+    if to_bytes is not None and not isinstance(data, int):
+        return to_bytes()
+    to_py = getattr(data, "to_py", None)        # an older JsProxy
     if to_py is not None:
-        return bytes(to_py())
+        return _as_buffer(to_py())
     return bytes(data)
 
 
+def _open_buffer(buf):
+    """A seekable file over a buffer from _as_buffer, without copying it.
+
+    io.BytesIO shares an initial bytes object until written to, but copies anything
+    else it is given; a memoryview gets a reader that slices the view instead.
+    """
+    return io.BytesIO(buf) if isinstance(buf, bytes) else _ViewReader(buf)
+
+
+class _ViewReader(io.RawIOBase):
+    """Read-only, seekable file over a byte memoryview."""
+
+    def __init__(self, view):
+        self._view, self._pos = view, 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
 def _dms_to_decimal(dms, ref: str) -> float:
     """Convert an EXIF (degrees, minutes, seconds) rational triple to decimal
     degrees, negating for S/W. This is the WGS84 hand-roll the survey describes."""
@@ -79,11 +133,23 @@ def _dms_to_decimal(dms, ref: str) -> float:
 
 def extract_gps(data: bytes):
     """Return (lat, lon) in WGS84 decimal degrees, or None if the photo has no
-    usable GPS EXIF."""
+    usable GPS EXIF. The header reader answers first; Pillow only if the container
+    is not one it knows."""
+    hdr = read_exif_header(data)
+    if hdr["container"]:
+        return hdr["gps"]
     try:
-        with Image.open(io.BytesIO(_as_bytes(data))) as img:
+        with Image.open(_open_buffer(_as_buffer(data))) as img:
             exif = img.getexif()
-            gps = exif.get_ifd(IFD.GPSInfo)
+    except Exception:
+        return None
+    return _gps_from_exif(exif)
+
+
+def _gps_from_exif(exif):
+    """The GPS half of extract_gps, on an EXIF block that is already parsed."""
+    try:
+        gps = exif.get_ifd(IFD.GPSInfo)
     except Exception:
         return None
 
@@ -119,44 +185,496 @@ def _exif_dt_to_iso(raw):
 
 def extract_datetime(data: bytes):
     """Return the capture timestamp as an ISO-8601 string, or None if absent."""
+    hdr = read_exif_header(data)
+    if hdr["container"]:
+        return hdr["taken"]
     try:
-        with Image.open(io.BytesIO(_as_bytes(data))) as img:
+        with Image.open(_open_buffer(_as_buffer(data))) as img:
             exif = img.getexif()
-            raw = exif.get_ifd(IFD.Exif).get(0x9003) or exif.get(0x0132)
+    except Exception:
+        return None
+    return _datetime_from_exif(exif)
+
+
+def _datetime_from_exif(exif):
+    """The capture-time half of extract_datetime, on an EXIF block already parsed."""
+    try:
+        raw = exif.get_ifd(IFD.Exif).get(0x9003) or exif.get(0x0132)
     except Exception:
         return None
     return _exif_dt_to_iso(raw)
 
 
-def encode_for_vision(data: bytes, *, max_edge: int = 1568):
+def encode_for_vision(data: bytes, *, max_edge: int = 1568, draft: bool = False, resize=None):
     """Return JPEG bytes (+ size) downscaled so the long edge is <= max_edge.
 
     The original docstring: "Claude downsizes large images server-side anyway; doing it
     here keeps token cost predictable and normalizes orientation/format." Panel 1
-    measures whether that is true, and on which models.
+    measures whether that is true, and on which models. `draft=True` lets the JPEG
+    decoder scale down first (see _draft); off by default, so the output is upstream's.
+    `resize` names one of RESIZE_PRESETS; None is Pillow's own thumbnail default.
     """
-    with Image.open(io.BytesIO(_as_bytes(data))) as im:
+    with Image.open(_open_buffer(_as_buffer(data))) as im:
+        if draft:
+            _draft(im, (max_edge, max_edge))
         im = ImageOps.exif_transpose(im)  # honor camera orientation
         im = im.convert("RGB")
-        if max(im.size) > max_edge:
-            im.thumbnail((max_edge, max_edge))
-        size = im.size
-        buf = io.BytesIO()
-        im.save(buf, format="JPEG", quality=85)
-    return buf.getvalue(), size
+        return _encode_from(im, max_edge=max_edge, resize=resize)
 
 
-def make_thumbnail(data: bytes, *, size=(400, 400)):
+def make_thumbnail(data: bytes, *, size=(400, 400), draft: bool = False, resize=None):
     """Return JPEG thumbnail bytes. Upstream these go to disk; the page shows them."""
-    with Image.open(io.BytesIO(_as_bytes(data))) as im:
+    with Image.open(_open_buffer(_as_buffer(data))) as im:
+        if draft:
+            _draft(im, size)
         im = ImageOps.exif_transpose(im)
         im = im.convert("RGB")
-        im.thumbnail(size)
-        buf = io.BytesIO()
-        im.save(buf, format="JPEG", quality=85)
+        return _thumbnail_from(im, size=size, resize=resize)
+
+
+# The two jobs above, from an image somebody already decoded. Neither touches it:
+# each shrinks a second Image over the same pixel core (Image._new), and thumbnail()
+# rebinds that to the resized core rather than writing into it. So one decoded photo
+# serves both jobs without the full-size copy im.copy() would make first.
+
+def _jpeg(im, quality: int = 85) -> bytes:
+    buf = io.BytesIO()
+    im.save(buf, format="JPEG", quality=quality)
     return buf.getvalue()
 
 
+def _encode_from(im, *, max_edge: int = 1568, resize=None):
+    if max(im.size) > max_edge:
+        im = im._new(im.im)
+        im.thumbnail((max_edge, max_edge), **_resize_args(resize))
+    return _jpeg(im), im.size
+
+
+def _thumbnail_from(im, *, size=(400, 400), resize=None) -> bytes:
+    im = im._new(im.im)
+    im.thumbnail(size, **_resize_args(resize))
+    return _jpeg(im)
+
+
+# ── the shrink itself: how much filter each thumbnail gets ─────────────────────
+# Image.thumbnail already takes the reduce-then-filter route: with a reducing_gap it
+# first box-averages by an integer factor (Image.reduce, cheap and exact), stopping
+# `reducing_gap` times above the target, and only the last stretch goes through the
+# resampling filter. The gap and the filter are the whole speed/quality knob.
+# Called with neither, thumbnail uses BICUBIC and a gap of 2.0 — the pipeline's output
+# as shipped, and the baseline resize_bench measures the presets against.
+
+RESIZE_PRESETS = {
+    "fast":     {"resample": Image.Resampling.BILINEAR, "reducing_gap": 1.0},
+    "balanced": {"resample": Image.Resampling.LANCZOS, "reducing_gap": 2.0},
+    "quality":  {"resample": Image.Resampling.LANCZOS, "reducing_gap": None},
+}
+
+
+def _resize_args(resize):
+    if resize is None:
+        return {}
+    if resize not in RESIZE_PRESETS:
+        raise ValueError(f"resize={resize!r} is not one of {list(RESIZE_PRESETS)}")
+    return RESIZE_PRESETS[resize]
+
+
+def _ssim(a, b):
+    """Mean SSIM of b against a on luminance, over 8x8 blocks (Wang et al. 2004's
+    constants). Block statistics come from Image.reduce on float images, so this
+    needs nothing beyond Pillow."""
+    if a.size != b.size:
+        b = b.resize(a.size, Image.BICUBIC)
+    x, y = a.convert("L").convert("F"), b.convert("L").convert("F")
+    mean = lambda im: im.reduce(8)
+    mul = lambda p, q: ImageMath.lambda_eval(lambda e: e["p"] * e["q"], p=p, q=q)
+    mx, my = mean(x), mean(y)
+    xx, yy, xy = mean(mul(x, x)), mean(mul(y, y)), mean(mul(x, y))
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    smap = ImageMath.lambda_eval(
+        lambda e: ((2 * e["mx"] * e["my"] + c1) * (2 * (e["xy"] - e["mx"] * e["my"]) + c2))
+        / ((e["mx"] * e["mx"] + e["my"] * e["my"] + c1)
+           * (e["xx"] - e["mx"] * e["mx"] + e["yy"] - e["my"] * e["my"] + c2)),
+        mx=mx, my=my, xx=xx, yy=yy, xy=xy)
+    values = smap.getdata()                 # ImageStat bins "F" images; average directly
+    return sum(values) / len(values)
+
+
+def resize_bench(n: int = 3, reps: int = 3) -> str:
+    """Each preset against the pipeline's own shrink, on sample_photos(n).
+
+    Every photo is decoded once; only the shrink is timed (best of `reps`). PSNR and
+    SSIM compare each preset's image with the baseline's, before JPEG encoding.
+    """
+    jobs = {"thumb": (400, 400), "encode": (1568, 1568)}
+    names = [None, *RESIZE_PRESETS]
+    ms = {nm: {j: [] for j in jobs} for nm in names}
+    psnr = {nm: {j: [] for j in jobs} for nm in names}
+    ssim = {nm: {j: [] for j in jobs} for nm in names}
+    for _, data in sample_photos(n):
+        im = decode_photo(data)[0]
+        for job, box in jobs.items():
+            base = None
+            for nm in names:
+                best = float("inf")
+                for _ in range(reps):
+                    c = im.copy()
+                    t0 = time.perf_counter()
+                    c.thumbnail(box, **_resize_args(nm))
+                    best = min(best, time.perf_counter() - t0)
+                ms[nm][job].append(best * 1e3)
+                if base is None:
+                    base = c
+                    continue
+                psnr[nm][job].append(_psnr(base, c))
+                ssim[nm][job].append(_ssim(base, c))
+    avg = lambda v: sum(v) / len(v) if v and None not in v else None
+    rows = {}
+    for nm in names:
+        rows[nm or "pillow default"] = {
+            "preset": RESIZE_PRESETS.get(nm) and {
+                "resample": RESIZE_PRESETS[nm]["resample"].name,
+                "reducing_gap": RESIZE_PRESETS[nm]["reducing_gap"]},
+            **{job: {"ms": avg(ms[nm][job]),
+                     "psnr_db": avg(psnr[nm][job]) if nm else None,
+                     "ssim": avg(ssim[nm][job]) if nm else 1.0} for job in jobs}}
+    return json.dumps({"photos": n, "baseline": "Image.thumbnail defaults (BICUBIC, reducing_gap=2.0)",
+                       "results": rows})
+
+
+def decode_photo(data, *, draft=None):
+    """Open a photo once: (RGB image, EXIF-transposed and loaded; parsed EXIF; format;
+    the photo's own (width, height) as displayed).
+
+    Every job in process_photo can start from this. On a 12 MP phone photo the JPEG
+    decode is most of the cost of any one of them, so paying it four times is the
+    difference between the pipeline's own per-stage functions and this. Pass a
+    `draft` box and a JPEG decodes only as large as it needs to cover that box.
+    """
+    with Image.open(_open_buffer(_as_buffer(data))) as src:
+        fmt = src.format or "?"
+        exif = src.getexif()
+        orig = _oriented(src.size, exif)
+        if draft:
+            _draft(src, draft, exif)
+        im = ImageOps.exif_transpose(src)
+        if im.mode != "RGB":
+            im = im.convert("RGB")
+        im.load()
+    return im, exif, fmt, orig
+
+
+# ── draft decoding: let the JPEG decoder do the first shrink ───────────────────
+# A JPEG stores 8x8 blocks of DCT coefficients, and libjpeg can reconstruct each block
+# at 1/2, 1/4 or 1/8 of its size for a fraction of the work. Pillow exposes that as
+# Image.draft. A 4032x3024 photo bound for a 400 px thumbnail decodes at 504x378:
+# one pixel in 64. Everything else about the job is the same.
+
+_AXES_SWAPPED = (5, 6, 7, 8)   # EXIF orientations that turn the photo on its side
+
+
+def _oriented(size, exif):
+    """(width, height) as the photo is meant to be seen, after EXIF orientation."""
+    w, h = size
+    return (h, w) if exif.get(0x0112) in _AXES_SWAPPED else (w, h)
+
+
+def _draft(src, box, exif=None):
+    """Ask the decoder for the largest DCT scale that still covers `box` once the photo
+    is fitted inside it the way Image.thumbnail fits it. Returns the scale (1, 2, 4 or
+    8); 1 for anything that is not a JPEG, where Pillow has no reduced decode."""
+    if src.format != "JPEG":
+        return 1
+    exif = src.getexif() if exif is None else exif
+    bw, bh = box
+    if exif.get(0x0112) in _AXES_SWAPPED:        # the box is in display orientation
+        bw, bh = bh, bw
+    w, h = src.size
+    ratio = min(bw / w, bh / h)
+    if ratio >= 1:
+        return 1
+    target = (max(math.ceil(w * ratio), 1), max(math.ceil(h * ratio), 1))
+    src.draft("RGB", target)
+    return w // src.size[0]
+
+
+def _psnr(a, b):
+    """Peak signal-to-noise ratio of b against a, in dB, over RGB. None if identical."""
+    if a.size != b.size:
+        b = b.resize(a.size, Image.BICUBIC)
+    sq = ImageStat.Stat(ImageChops.difference(a, b)).sum2
+    mse = sum(sq) / (len(sq) * a.size[0] * a.size[1])
+    return 10 * math.log10(255 ** 2 / mse) if mse else None
+
+
+def draft_error(name: str, data: bytes) -> str:
+    """What draft decoding costs in fidelity and saves in time, for one photo.
+
+    Both jobs run twice — full decode, then draft decode — and the shrunk images are
+    compared before JPEG encoding, so the figure is the decoder's difference alone.
+    `max_diff` is the largest per-channel difference in 0-255 anywhere in the image.
+    """
+    data = _as_buffer(data)
+    out = {"name": name}
+    for job, box in (("thumb", (400, 400)), ("encode", (1568, 1568))):
+        runs = {}
+        for mode in ("full", "draft"):
+            t0 = time.perf_counter()
+            with Image.open(_open_buffer(data)) as src:
+                scale = _draft(src, box) if mode == "draft" else 1
+                decoded = _oriented(src.size, src.getexif())
+                im = ImageOps.exif_transpose(src).convert("RGB")
+            im.thumbnail(box)                     # a no-op when it already fits
+            runs[mode] = (im, scale, decoded, (time.perf_counter() - t0) * 1e3)
+        full, draft = runs["full"][0], runs["draft"][0]
+        diff = ImageChops.difference(full, draft.resize(full.size, Image.BICUBIC)
+                                     if draft.size != full.size else draft)
+        out[job] = {"scale": runs["draft"][1], "decoded": list(runs["draft"][2]),
+                    "size": {"full": list(full.size), "draft": list(draft.size)},
+                    "psnr_db": _psnr(full, draft),
+                    "max_diff": max(hi for _, hi in diff.getextrema()),
+                    "ms": {"full": runs["full"][3], "draft": runs["draft"][3]}}
+    return json.dumps(out)
+
+
+# ── the header alone: GPS and capture time without opening the image ──────────
+# Image.open plus getexif goes through Pillow's whole open path to reach a few tags
+# that sit in the first few KB of the file. This walks the container by hand instead:
+# JPEG segments up to the first SOS (start of scan, where the pixels begin), or the
+# boxes of a HEIF file down to its Exif item. Nothing past the EXIF block is read,
+# so a folder can be triaged before anything in it is decoded.
+
+_TIFF_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}   # EXIF type -> bytes
+
+
+def _byte_reader(source):
+    """read_at(offset, n) over bytes, a buffer or a binary file; plus a tally
+    of the bytes it actually handed back. Files are read, never slurped."""
+    seen = [0]
+    if hasattr(source, "read"):
+        f = source
+
+        def read_at(offset, n):
+            f.seek(offset)
+            chunk = f.read(n)
+            seen[0] += len(chunk)
+            return chunk
+    else:
+        buf = memoryview(_as_buffer(source))
+
+        def read_at(offset, n):
+            chunk = bytes(buf[offset:offset + n])
+            seen[0] += len(chunk)
+            return chunk
+    return read_at, seen
+
+
+def _jpeg_app1(read_at):
+    """The TIFF block from a JPEG's Exif APP1 segment, or None. Stops at SOS."""
+    pos = 2
+    while True:
+        head = read_at(pos, 4)
+        if len(head) < 4 or head[0] != 0xFF:
+            return None
+        marker = head[1]
+        if marker == 0xFF:                       # fill byte before a marker
+            pos += 1
+            continue
+        if marker in (0xDA, 0xD9):               # SOS or EOI: pixels, or the end
+            return None
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:   # markers with no length
+            pos += 2
+            continue
+        length = struct.unpack(">H", head[2:4])[0]
+        if marker == 0xE1:
+            body = read_at(pos + 4, length - 2)
+            if body[:6] == b"Exif\x00\x00":
+                return body[6:]
+        pos += 2 + length
+
+
+def _boxes(read_at, start, end):
+    """Yield (type, payload offset, payload end) for the ISO-BMFF boxes in a range."""
+    pos = start
+    while end is None or pos + 8 <= end:
+        head = read_at(pos, 8)
+        if len(head) < 8:
+            return
+        size, kind = struct.unpack(">I4s", head)
+        hdr = 8
+        if size == 1:                            # 64-bit size follows
+            size = struct.unpack(">Q", read_at(pos + 8, 8))[0]
+            hdr = 16
+        elif size == 0:                          # runs to the end of the file
+            yield kind, pos + hdr, end
+            return
+        if size < hdr:
+            return
+        yield kind, pos + hdr, pos + size
+        pos += size
+
+
+def _heif_exif(read_at):
+    """The TIFF block from a HEIF file's Exif item, or None.
+
+    meta holds iinf (which item is the Exif) and iloc (where its bytes are). The
+    payload opens with a 4-byte offset to the TIFF header, past an 'Exif\\0\\0' prefix.
+    """
+    meta = next(((a, b) for k, a, b in _boxes(read_at, 0, None) if k == b"meta"), None)
+    if meta is None:
+        return None
+    exif_id = idat = None
+    locs = {}
+    for kind, a, b in _boxes(read_at, meta[0] + 4, meta[1]):      # meta is a FullBox
+        if kind == b"iinf":
+            version = read_at(a, 1)[0]
+            first = a + (6 if version == 0 else 8)
+            for k2, a2, _ in _boxes(read_at, first, b):
+                if k2 != b"infe":
+                    continue
+                v = read_at(a2, 1)[0]
+                if v < 2:
+                    continue
+                if v == 2:
+                    item_id, item_type = struct.unpack(">H2x4s", read_at(a2 + 4, 8))
+                else:
+                    item_id, item_type = struct.unpack(">I2x4s", read_at(a2 + 4, 10))
+                if item_type == b"Exif":
+                    exif_id = item_id
+        elif kind == b"iloc":
+            locs = _iloc(read_at(a, b - a))
+        elif kind == b"idat":
+            idat = a
+    if exif_id is None or exif_id not in locs:
+        return None
+    method, extents = locs[exif_id]
+    if method == 1:
+        if idat is None:
+            return None
+        extents = [(idat + off, n) for off, n in extents]
+    elif method != 0:
+        return None
+    payload = b"".join(read_at(off, n) for off, n in extents)
+    if len(payload) < 4:
+        return None
+    skip = 4 + struct.unpack(">I", payload[:4])[0]
+    return payload[skip:]
+
+
+def _iloc(body):
+    """Parse an iloc box: {item_id: (construction_method, [(offset, length), ...])}."""
+    version = body[0]
+    p = 4
+
+    def num(size):
+        nonlocal p
+        v = int.from_bytes(body[p:p + size], "big") if size else 0
+        p += size
+        return v
+
+    sizes = num(2)
+    off_size, len_size, base_size = sizes >> 12, (sizes >> 8) & 15, (sizes >> 4) & 15
+    idx_size = sizes & 15 if version in (1, 2) else 0
+    out = {}
+    for _ in range(num(2 if version < 2 else 4)):
+        item_id = num(2 if version < 2 else 4)
+        method = num(2) & 15 if version in (1, 2) else 0
+        num(2)                                       # data_reference_index
+        base = num(base_size)
+        extents = []
+        for _ in range(num(2)):
+            num(idx_size)
+            off = num(off_size)
+            extents.append((base + off, num(len_size)))
+        out[item_id] = (method, extents)
+    return out
+
+
+def _tiff_tags(tiff, wanted):
+    """{ifd: {tag: value}} for the wanted tags of IFD0, the Exif IFD and the GPS IFD.
+
+    `wanted` maps an IFD name ("0", "exif", "gps") to a set of tag numbers. ASCII comes
+    back as str, rationals as floats (None for a zero denominator), the rest as ints.
+    """
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None:
+        return {}
+
+    def ifd(offset, tags):
+        found = {}
+        if offset + 2 > len(tiff):
+            return found
+        count = struct.unpack(order + "H", tiff[offset:offset + 2])[0]
+        for i in range(count):
+            e = offset + 2 + 12 * i
+            if e + 12 > len(tiff):
+                break
+            tag, typ, n = struct.unpack(order + "HHI", tiff[e:e + 8])
+            if tag not in tags or typ not in _TIFF_SIZES:
+                continue
+            size = _TIFF_SIZES[typ] * n
+            at = e + 8 if size <= 4 else struct.unpack(order + "I", tiff[e + 8:e + 12])[0]
+            raw = tiff[at:at + size]
+            if len(raw) < size:
+                continue
+            if typ == 2:
+                found[tag] = raw.split(b"\x00", 1)[0].decode("latin-1")
+            elif typ in (5, 10):
+                fmt = order + ("%dI" if typ == 5 else "%di") % (2 * n)
+                v = struct.unpack(fmt, raw)
+                found[tag] = tuple(v[j] / v[j + 1] if v[j + 1] else None for j in range(0, 2 * n, 2))
+            else:
+                fmt = order + {1: "B", 3: "H", 4: "I", 7: "B", 9: "i"}[typ] * n
+                v = struct.unpack(fmt, raw)
+                found[tag] = v[0] if n == 1 else v
+        return found
+
+    ifd0_at = struct.unpack(order + "I", tiff[4:8])[0]
+    ifd0 = ifd(ifd0_at, wanted.get("0", set()) | {0x8769, 0x8825})
+    out = {"0": ifd0}
+    for name, ptr in (("exif", 0x8769), ("gps", 0x8825)):
+        if name in wanted and isinstance(ifd0.get(ptr), int):
+            out[name] = ifd(ifd0[ptr], wanted[name])
+    return out
+
+
+def read_exif_header(source):
+    """GPS and capture time from the EXIF block alone, in one pass over the header.
+
+    `source` is bytes, any buffer, a path, or a binary file. Returns a dict: `gps`
+    ((lat, lon) or None), `taken` (ISO-8601 or None), `container` ("jpeg", "heif", or
+    None when it is neither, or its header would not parse) and `bytes_read`, which is
+    the point: a few KB, not the photo. Callers fall back to Pillow on container None.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return read_exif_header(f)
+    read_at, seen = _byte_reader(source)
+    out = {"gps": None, "taken": None, "container": None, "bytes_read": 0}
+    try:
+        head = read_at(0, 12)
+        if head[:2] == b"\xff\xd8":
+            container, tiff = "jpeg", _jpeg_app1(read_at)
+        elif head[4:8] == b"ftyp":
+            container, tiff = "heif", _heif_exif(read_at)
+        else:
+            container, tiff = None, None
+        if tiff:
+            tags = _tiff_tags(tiff, {"0": {0x0132}, "exif": {0x9003}, "gps": {1, 2, 3, 4}})
+            gps = tags.get("gps", {})
+            lat, lon = gps.get(2), gps.get(4)
+            if (gps.get(1) and gps.get(3) and lat and lon and len(lat) == 3 and len(lon) == 3
+                    and None not in lat + lon):
+                out["gps"] = (_dms_to_decimal(lat, gps[1]), _dms_to_decimal(lon, gps[3]))
+            out["taken"] = _exif_dt_to_iso(tags.get("exif", {}).get(0x9003)
+                                           or tags["0"].get(0x0132))
+        out["container"] = container
+    except (struct.error, IndexError, ValueError, OSError):
+        out["gps"] = out["taken"] = None
+    out["bytes_read"] = seen[0]
+    return out
+
+
 # ── the vision call: what it would cost. No network, ever. ─────────────────────
 
 def count_image_tokens(width: int, height: int) -> int:
@@ -195,6 +713,78 @@ def resized_size(width: int, height: int, max_edge: int = 1568, max_tokens: int
     return (lo, max(round(lo / aspect_ratio), 1))
 
 
+def resized_size_direct(width: int, height: int, max_edge: int = 1568, max_tokens: int = 1568):
+    """resized_size, solved from the patch grid instead of bisected. Same answer, always.
+
+    resized_size stays the reference — the docs' own code, copied — and this is what
+    the pricing path calls. Its `fits` is monotone in the width it tries (the height
+    follows by rounding, and every term only grows), so the answer is the widest width
+    whose patch grid fits. Columns of patches `pw` come first: the token budget bounds
+    them near sqrt(max_tokens * aspect), and for each `pw` the widest width is capped
+    by 28 * pw, by the source, and by how many rows of patches are left. The one float
+    step, the reference's round(w / aspect), is settled by checking its neighbours.
+    check_resized_size compares the two over a grid.
+    """
+    E = max_edge // 28
+    if (math.ceil(width / 28) <= E and math.ceil(height / 28) <= E
+            and count_image_tokens(width, height) <= max_tokens):
+        return (width, height)
+    if height > width:
+        resized_h, resized_w = resized_size_direct(height, width, max_edge, max_tokens)
+        return (resized_w, resized_h)
+
+    aspect_ratio = width / height
+
+    def widest(rows):
+        """The largest w whose height, rounded as the reference rounds it, fits `rows`."""
+        cap = 28 * rows
+        w = int((cap + 0.5) * aspect_ratio)
+        while w > 0 and round(w / aspect_ratio) > cap:
+            w -= 1
+        while round((w + 1) / aspect_ratio) <= cap:
+            w += 1
+        return w
+
+    # pw * (pw - 1) / aspect - pw / 56 <= max_tokens holds for any grid that fits
+    b = 1 + aspect_ratio / 56
+    pw = min(E, math.ceil((width - 1) / 28),
+             math.ceil((b + math.sqrt(b * b + 4 * max_tokens * aspect_ratio)) / 2) + 1)
+    for pw in range(pw, 0, -1):
+        rows = min(E, max_tokens // pw)
+        if rows < 1:
+            continue
+        w = min(28 * pw, width - 1, widest(rows))
+        if w > 28 * (pw - 1):
+            return (w, max(round(w / aspect_ratio), 1))
+    return (1, max(round(1 / aspect_ratio), 1))
+
+
+def check_resized_size(lo: int = 1000, hi: int = 3200, step: int = 1, big: int = 9000,
+                       big_step: int = 7, tiers=None) -> str:
+    """Differential check of resized_size_direct against the reference, on both tiers.
+
+    Every (width, height) in lo..hi at `step` — the band where both tiers' edge and
+    token ceilings bind, so nearly every case goes through the solver rather than the
+    early "fits" return — then a coarser sweep from 1 up to `big` at `big_step` for the
+    thin shapes and the huge ones. `tiers` is a list of TIERS keys (default both).
+    Returns the count solved, the count checked, and any mismatches (the first 20).
+    A few minutes natively at step 1; scripts/test_muster.py runs it.
+    """
+    grid = [(w, h) for w in range(lo, hi + 1, step) for h in range(lo, hi + 1, step)]
+    sweep = [(w, h) for w in range(1, big + 1, big_step) for h in range(1, big + 1, big_step * 11)]
+    grid += sweep + [(h, w) for w, h in sweep]
+    bad = []; solved = 0
+    for t in (TIERS[k] for k in (tiers or TIERS)):
+        for w, h in grid:
+            ref = resized_size(w, h, t["max_edge"], t["max_tokens"])
+            got = resized_size_direct(w, h, t["max_edge"], t["max_tokens"])
+            solved += ref != (w, h)
+            if ref != got and len(bad) < 20:
+                bad.append({"size": [w, h], "tier": t["label"], "reference": ref, "direct": got})
+    return json.dumps({"checked": len(grid) * len(tiers or TIERS), "solved": solved,
+                       "mismatches": bad, "ok": not bad})
+
+
 # Resolution tiers, docs.claude.com "Resolution and token cost", read 2026-08-21.
 TIERS = {
     "high": {"max_edge": 2576, "max_tokens": 4784, "label": "high-resolution (Claude 4.7 and later)"},
@@ -224,9 +814,7 @@ def vision_cost(width: int, height: int, model: str):
     dimensions are measured from the reader's file; everything else is published.
     """
     in_rate, out_rate, tier = PRICING[model]
-    t = TIERS[tier]
-    rw, rh = resized_size(width, height, t["max_edge"], t["max_tokens"])
-    visual = count_image_tokens(rw, rh)
+    rw, rh, visual = _tier_resize(int(width), int(height), tier)
     inp = visual + PROMPT_TOKENS
     return {
         "model": model, "tier": tier, "resized": [rw, rh], "visual_tokens": visual,
@@ -235,17 +823,68 @@ def vision_cost(width: int, height: int, model: str):
     }
 
 
+# A phone shoots in a handful of sizes, and every model on one tier resizes them the
+# same way, so the resize is worked out once per (width, height, tier) and remembered.
+@functools.lru_cache(maxsize=4096)
+def _tier_resize(width: int, height: int, tier: str):
+    t = TIERS[tier]
+    rw, rh = resized_size_direct(width, height, t["max_edge"], t["max_tokens"])
+    return rw, rh, count_image_tokens(rw, rh)
+
+
+def price_table(dims) -> str:
+    """Price a whole job at once: every model against every distinct photo size.
+
+    `dims` is a list of (width, height), one per photo, repeats and all. Returns a
+    compact table — `sizes` as [width, height, photos], then `visual_tokens` and `usd`
+    as one row per size with one column per model in `models` order — plus each
+    model's `total_usd` for the job. Same figures as vision_cost, photo for photo.
+    """
+    counts = collections.Counter((int(w), int(h)) for w, h in dims)
+    models = list(PRICING)
+    tokens, usd = [], []
+    for w, h in counts:
+        row = [vision_cost(w, h, m) for m in models]
+        tokens.append([c["visual_tokens"] for c in row])
+        usd.append([c["usd"] for c in row])
+    n = list(counts.values())
+    return json.dumps({
+        "models": models, "sizes": [[w, h, k] for (w, h), k in counts.items()],
+        "visual_tokens": tokens, "usd": usd,
+        "total_usd": [sum(k * r[j] for k, r in zip(n, usd)) for j in range(len(models))],
+        "photos": sum(n), "note": PRICE_NOTE,
+    })
+
+
 # ── all three local jobs for one photo, measured ────────────────────────────────
 
-def process_photo(name: str, data: bytes) -> str:
+def process_photo(name: str, data: bytes, *, decode: str = "once", draft: bool = False,
+                  resize=None) -> str:
     """Run the three local jobs on one photo and price the vision call both ways.
 
     Every field here except the prices is measured from the bytes handed in.
+    `decode="once"` opens the photo a single time and builds the thumbnail and the
+    vision encode from that one image; `decode="per-stage"` runs the pipeline's own
+    functions as shipped, each opening the bytes again, so the two can be timed.
+    `draft=True` lets a JPEG decode at reduced scale; draft_error says what that costs.
+    `resize` picks one of RESIZE_PRESETS for both shrinks; resize_bench compares them.
     """
-    data = _as_bytes(data)
+    try:
+        memoryview(data)
+        copies = 0
+    except TypeError:
+        copies = 1                              # a JsProxy: copied once, right here
+    data = _as_buffer(data)
+    if decode == "once":
+        report = _photo_once(name, data, draft, resize)[0]
+        if report["ok"]:
+            report["mem"]["input_copies"] = copies
+        return json.dumps(report)
+    if decode != "per-stage":
+        raise ValueError(decode)
     t0 = time.perf_counter()
     try:
-        with Image.open(io.BytesIO(data)) as probe:
+        with Image.open(_open_buffer(data)) as probe:
             probe = ImageOps.exif_transpose(probe)
             w, h = probe.size
             fmt = probe.format or "?"
@@ -254,25 +893,370 @@ def process_photo(name: str, data: bytes) -> str:
 
     gps = extract_gps(data)
     t1 = time.perf_counter()
-    thumb = make_thumbnail(data)
+    thumb = make_thumbnail(data, draft=draft, resize=resize)
     t2 = time.perf_counter()
-    enc, enc_size = encode_for_vision(data)
+    enc, enc_size = encode_for_vision(data, draft=draft, resize=resize)
     t3 = time.perf_counter()
+    taken = extract_datetime(data)
 
-    return json.dumps({
+    report = _photo_report(name, data, fmt, (w, h), gps, taken, thumb, enc, enc_size,
+                           {"gps": (t1 - t0) * 1e3, "thumb": (t2 - t1) * 1e3,
+                            "encode": (t3 - t2) * 1e3})
+    # the probe, the thumbnail and the encode each decode; one at a time, so the peak is
+    # one decode's — estimated at full size, which overstates a draft decode
+    report["mem"] = _mem(data, (w, h), enc_size, decodes=3, copies=copies)
+    return json.dumps(report)
+
+
+def _photo_once(name, data, draft=False, resize=None):
+    """The single-decode pipeline: (report, thumbnail bytes, encoded bytes). On a photo
+    that will not open, the report says why and both artifacts are None."""
+    t0 = time.perf_counter()
+    try:
+        # the encode's box covers the thumbnail's, so one draft scale serves both
+        im, exif, fmt, size = decode_photo(data, draft=(1568, 1568) if draft else None)
+    except Exception as exc:
+        return {"name": name, "ok": False, "error": f"{type(exc).__name__}: {exc}"}, None, None
+    t1 = time.perf_counter()
+    gps = _gps_from_exif(exif)
+    taken = _datetime_from_exif(exif)
+    t2 = time.perf_counter()
+    enc, enc_size = _encode_from(im, resize=resize)
+    t3 = time.perf_counter()
+    thumb = _thumbnail_from(im, resize=resize)
+    t4 = time.perf_counter()
+
+    report = _photo_report(name, data, fmt, size, gps, taken, thumb, enc, enc_size,
+                           {"decode": (t1 - t0) * 1e3, "gps": (t2 - t1) * 1e3,
+                            "thumb": (t4 - t3) * 1e3, "encode": (t3 - t2) * 1e3})
+    report["mem"] = _mem(data, im.size, enc_size, decodes=1)
+    return report, thumb, enc
+
+
+def _mem(data, decoded_size, enc_size, decodes, copies=0):
+    """A report's mem block: arithmetic on the dimensions, the byte counts named est_ so
+    nobody reads them as a measurement. Pillow keeps RGB at 4 bytes a pixel. At the peak
+    the input, one decoded photo and the encode's shrunk pixels are all alive; nothing
+    else is anywhere near as big. What is measured — the resident high-water mark — is a
+    process's, not a photo's, so it is in ingest_summary, once per run."""
+    decoded = 4 * decoded_size[0] * decoded_size[1]
+    return {"input_bytes": len(data), "input_copies": copies, "decodes": decodes,
+            "est_decoded_bytes": decoded,
+            "est_peak_bytes": len(data) + decoded + 4 * enc_size[0] * enc_size[1]}
+
+
+def _rss_peak_kb(who="self"):
+    """A resident high-water mark in KB, where the platform reports one: this process's
+    ("self") or its largest finished child's ("children" — the pool's workers, once the
+    pool has shut down). Both are for the process's lifetime, not for one batch."""
+    try:
+        import resource
+    except ImportError:                         # Windows; WebAssembly
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak   # macOS says bytes
+
+
+def _photo_report(name, data, fmt, orig, gps, taken, thumb, enc, enc_size, ms):
+    w, h = orig
+    return {
         "name": name, "ok": True, "format": fmt,
         "orig": [w, h], "orig_bytes": len(data),
         "encoded": list(enc_size), "encoded_bytes": len(enc),
         "thumb_bytes": len(thumb),
         "gps": list(gps) if gps else None,
-        "taken": extract_datetime(data),
-        "ms": {"gps": (t1 - t0) * 1e3, "thumb": (t2 - t1) * 1e3, "encode": (t3 - t2) * 1e3},
+        "taken": taken,
+        "ms": ms,
         # the vision call, priced both ways: as shot, and after encoding did its job
         "cost": {
             m: {"raw": vision_cost(w, h, m), "encoded": vision_cost(*enc_size, m)}
             for m in PRICING
         },
-    })
+    }
+
+
+# ── a folder of photos: the same jobs, on every core ───────────────────────────
+# One photo at a time leaves every core but one idle. Natively the jobs go to a process
+# pool (decoding holds the GIL for long stretches, so threads would not help); under
+# Pyodide there are no processes, and the same generator runs them in a loop instead.
+
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".heic", ".heif", ".png", ".webp", ".tif", ".tiff")
+
+
+def _cores():
+    """Cores this process may run on: the affinity mask where there is one."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _ingest_one(name, source, draft, resize=None):
+    """One photo for the pool: read the file here, in the worker, if given a path."""
+    if isinstance(source, (str, os.PathLike)):
+        try:
+            with open(source, "rb") as f:
+                source = f.read()
+        except OSError as exc:
+            return json.dumps({"name": name, "ok": False, "error": f"{type(exc).__name__}: {exc}"})
+    return process_photo(name, source, draft=draft, resize=resize)
+
+
+def _named(items):
+    for i, item in enumerate(items):
+        if isinstance(item, tuple):
+            yield item
+        elif isinstance(item, (str, os.PathLike)):
+            yield os.path.basename(item), item
+        else:
+            yield f"photo_{i + 1:04d}", item
+
+
+def process_many(items, *, workers=None, draft: bool = False, resize=None):
+    """Yield process_photo's report, as a dict, for each photo in completion order.
+
+    `items` is any iterable of paths, byte buffers, or (name, path-or-bytes) pairs, and
+    is consumed lazily: at most a few photos per worker are in flight at once, so a
+    folder of thousands never sits in memory. `workers=None` is one per core; 1, or
+    running under Pyodide, is the serial path, in input order.
+    """
+    jobs = ((name, source, draft, resize) for name, source in _named(items))
+    for out in _pooled(_ingest_one, jobs, workers):
+        yield json.loads(out)
+
+
+def _pooled(fn, jobs, workers=None):
+    """Yield fn(*job) for each job, in completion order, a few per worker in flight.
+
+    A process pool natively; a plain loop, in input order, for one worker, under
+    Pyodide, or wherever the platform cannot make a pool. `fn` must be module-level.
+    A memoryview cannot be pickled, so one bound for a pool crosses as bytes. If the
+    workers die, the jobs they held, and the rest, run in-process.
+    """
+    if workers is None:
+        workers = _cores()
+    pool = None
+    if workers > 1 and sys.platform != "emscripten":
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError, ImportError):   # no sem_open, no fork
+            pool = None
+    if pool is None:
+        for job in jobs:
+            yield fn(*job)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, wait
+    pending = {}                                   # future -> its job, to rerun if the pool breaks
+
+    def drain(done):
+        for fut in done:
+            out = fut.result()
+            del pending[fut]
+            yield out
+
+    try:
+        with pool:
+            for job in jobs:
+                job = [bytes(a) if isinstance(a, memoryview) else a for a in job]
+                pending[pool.submit(fn, *job)] = job
+                if len(pending) >= workers * 4:
+                    yield from drain(wait(pending, return_when=FIRST_COMPLETED)[0])
+            while pending:
+                yield from drain(wait(pending, return_when=FIRST_COMPLETED)[0])
+    except BrokenExecutor:
+        for fut, job in pending.items():
+            finished = fut.done() and not fut.cancelled() and fut.exception() is None
+            yield fut.result() if finished else fn(*job)
+        for job in jobs:
+            yield fn(*job)
+
+
+def _photo_paths(folder):
+    """Every photo under `folder`, recursively, by extension, sorted."""
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(folder) for f in files
+                  if f.lower().endswith(PHOTO_EXTENSIONS))
+
+
+def _percentile(ordered, q):
+    """Nearest-rank percentile of an already-sorted list."""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def ingest_summary(reports, seconds: float, workers=None):
+    """Throughput and per-stage ms percentiles (p50/p90/p99) for a batch of reports, and
+    the measured resident peaks: this process's and, with a pool, its workers'."""
+    ok = [r for r in reports if r.get("ok")]
+    stages = {}
+    for r in ok:
+        for stage, ms in r["ms"].items():
+            stages.setdefault(stage, []).append(ms)
+    return {
+        "n": len(reports), "ok": len(ok), "seconds": seconds, "workers": workers,
+        "photos_per_s": len(reports) / seconds if seconds else None,
+        "stage_ms": {stage: {f"p{q}": _percentile(sorted(v), q) for q in (50, 90, 99)}
+                     for stage, v in stages.items()},
+        "rss_peak_kb": _rss_peak_kb(),
+        "rss_peak_kb_workers": _rss_peak_kb("children") if workers and workers > 1 else None,
+    }
+
+
+def process_folder(folder, *, workers=None, draft: bool = False, resize=None) -> str:
+    """Every photo under `folder`, through process_many: the batch summary, then the
+    per-photo reports in the order they finished."""
+    paths = _photo_paths(folder)
+    if workers is None:
+        workers = _cores()
+    t0 = time.perf_counter()
+    reports = list(process_many(paths, workers=workers, draft=draft, resize=resize))
+    summary = ingest_summary(reports, time.perf_counter() - t0, workers)
+    return json.dumps({**summary, "reports": reports})
+
+
+# ── the index: what a re-run can skip ──────────────────────────────────────────
+# A nightly ingest over an archive that barely changes should not decode it again.
+# One SQLite file remembers, per photo path, the stat it was processed at, its content
+# hash, what was extracted and the two artifacts. A re-run stats every file and touches
+# only the ones whose stat moved; of those, content it has already seen under another
+# name (a rename, a copy, a touch) is copied across rather than decoded. Rows for files
+# that have gone are evicted. The recipe — this file's version, draft flag and resize —
+# is part of the key, so a change to the pipeline reprocesses everything once.
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS photos (
+    path     TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    sha256   TEXT NOT NULL,
+    recipe   TEXT NOT NULL,
+    ok       INTEGER NOT NULL,
+    width    INTEGER,
+    height   INTEGER,
+    lat      REAL,
+    lon      REAL,
+    taken    TEXT,
+    report   TEXT NOT NULL,
+    thumb    BLOB,
+    encoded  BLOB
+);
+CREATE INDEX IF NOT EXISTS photos_by_sha256 ON photos (sha256, recipe);
+"""
+
+
+def open_index(path):
+    """The photo index at `path` (created if absent), as a sqlite3 connection."""
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    conn.executescript(_INDEX_SCHEMA)
+    return conn
+
+
+def _sha256_file(path):
+    import hashlib
+
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _index_one(path, draft, resize=None):
+    """One changed photo for the pool: (path, report, thumbnail, encoded)."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as exc:
+        return path, {"name": os.path.basename(path), "ok": False,
+                      "error": f"{type(exc).__name__}: {exc}"}, None, None
+    return (path, *_photo_once(os.path.basename(path), data, draft, resize))
+
+
+def index_folder(folder, index_path, *, workers=None, draft: bool = False,
+                 resize=None) -> str:
+    """Bring the index at `index_path` up to date with `folder`; process only what changed.
+
+    Returns counts — `unchanged` (stat matched, not opened), `copied` (stat moved but
+    the content was already indexed), `processed`, `evicted` — and the seconds taken.
+    """
+    t0 = time.perf_counter()
+    _resize_args(resize)                        # refuse a bad preset before any work
+    recipe = f"{__version__}/draft={bool(draft)}/resize={resize}"
+    folder = os.path.abspath(folder)
+    conn = open_index(index_path)
+    known = {p: (m, n, r) for p, m, n, r in
+             conn.execute("SELECT path, mtime_ns, size, recipe FROM photos")}
+    seen, todo = set(), []
+    counts = {"unchanged": 0, "copied": 0, "processed": 0, "evicted": 0}
+    for path in _photo_paths(folder):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        seen.add(path)
+        if known.get(path) == (st.st_mtime_ns, st.st_size, recipe):
+            counts["unchanged"] += 1
+            continue
+        sha = _sha256_file(path)
+        twin = conn.execute(
+            "SELECT ok, width, height, lat, lon, taken, report, thumb, encoded FROM photos "
+            "WHERE sha256 = ? AND recipe = ? LIMIT 1", (sha, recipe)).fetchone()
+        if twin:
+            report = json.loads(twin[6])
+            report["name"] = os.path.basename(path)
+            conn.execute("INSERT OR REPLACE INTO photos VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                         (path, st.st_mtime_ns, st.st_size, sha, recipe, *twin[:6],
+                          json.dumps(report), *twin[7:]))
+            counts["copied"] += 1
+        else:
+            todo.append((path, (st.st_mtime_ns, st.st_size, sha)))
+
+    stats = dict(todo)
+    jobs = ((path, draft, resize) for path, _ in todo)
+    for i, (path, report, thumb, enc) in enumerate(_pooled(_index_one, jobs, workers)):
+        mtime_ns, size, sha = stats[path]
+        gps = report.get("gps") or (None, None)
+        w, h = report.get("orig") or (None, None)
+        conn.execute("INSERT OR REPLACE INTO photos VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                     (path, mtime_ns, size, sha, recipe, int(report["ok"]), w, h, *gps,
+                      report.get("taken"), json.dumps(report), thumb, enc))
+        counts["processed"] += 1
+        if i % 200 == 199:                      # a killed run keeps what it finished
+            conn.commit()
+
+    prefix = os.path.join(folder, "")
+    gone = [(p,) for p in known if p.startswith(prefix) and p not in seen]
+    conn.executemany("DELETE FROM photos WHERE path = ?", gone)
+    counts["evicted"] = len(gone)
+    conn.commit()
+    conn.close()
+    return json.dumps({"folder": folder, "index": str(index_path), "recipe": recipe,
+                       **counts, "seconds": time.perf_counter() - t0})
+
+
+def indexed_reports(index_path, folder=None):
+    """Yield process_photo's report, as a dict, for every indexed photo (under `folder`,
+    if given) — straight into write_geojson, with nothing decoded."""
+    conn = open_index(index_path)
+    try:
+        rows = conn.execute("SELECT path, report FROM photos ORDER BY path")
+        prefix = os.path.join(os.path.abspath(folder), "") if folder else ""
+        for path, report in rows:
+            if path.startswith(prefix):
+                yield json.loads(report)
+    finally:
+        conn.close()
+
+
+def indexed_artifact(index_path, path, kind: str = "thumb"):
+    """The stored thumbnail ("thumb") or vision encode ("encoded") bytes for one path."""
+    if kind not in ("thumb", "encoded"):
+        raise ValueError(kind)
+    conn = open_index(index_path)
+    try:
+        row = conn.execute(f"SELECT {kind} FROM photos WHERE path = ?",
+                           (os.path.abspath(path),)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
 
 
 def build_feature_collection(records) -> str:
@@ -281,19 +1265,73 @@ def build_feature_collection(records) -> str:
     `records` is a list of dicts carrying at least name/gps, plus whatever the vision
     call returned for that photo (absent until the reader brings an analysis back).
     """
-    feats = []
-    for r in records:
-        gps = r.get("gps")
-        if not gps:
-            continue
-        props = {"photo": r.get("name"), "taken": r.get("taken")}
-        for k in ("kind", "category", "severity", "summary", "area_type", "disposition"):
-            if r.get(k) is not None:
-                props[k] = r[k]
-        feats.append({"type": "Feature",
-                      "geometry": {"type": "Point", "coordinates": [gps[1], gps[0]]},
-                      "properties": props})
-    return json.dumps({"type": "FeatureCollection", "features": feats}, indent=2)
+    return "".join(iter_geojson(records, compact=False))
+
+
+def _feature(r):
+    """One record as a GeoJSON Feature, or None if it has nowhere to be."""
+    gps = r.get("gps")
+    if not gps:
+        return None
+    props = {"photo": r.get("name"), "taken": r.get("taken")}
+    for k in ("kind", "category", "severity", "summary", "area_type", "disposition"):
+        if r.get(k) is not None:
+            props[k] = r[k]
+    return {"type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [gps[1], gps[0]]},
+            "properties": props}
+
+
+_COMPACT = (",", ":")
+
+
+def iter_geojson(records, *, compact: bool = True, seq: bool = False):
+    """Yield the FeatureCollection as text, one feature at a time.
+
+    `records` can be any iterator — process_many's output, say — and only the feature
+    being written is ever held. `compact` drops the whitespace (indented output is
+    byte-for-byte build_feature_collection's); `seq` writes GeoJSON Text Sequences
+    (RFC 8142) instead: one record separator, one Feature, one newline, no wrapper,
+    so a reader can start plotting before the file ends.
+    """
+    return _geojson_chunks(filter(None, map(_feature, records)), compact, seq)
+
+
+def _geojson_chunks(feats, compact, seq):
+    if seq:
+        for f in feats:
+            yield "\x1e" + json.dumps(f, separators=_COMPACT) + "\n"
+        return
+    if compact:
+        yield '{"type":"FeatureCollection","features":['
+        sep = ""
+        for f in feats:
+            yield sep + json.dumps(f, separators=_COMPACT)
+            sep = ","
+        yield "]}"
+        return
+    # json.dumps(..., indent=2) of the whole collection, reproduced a feature at a time
+    head = '{\n  "type": "FeatureCollection",\n  "features": ['
+    sep = "\n"
+    for f in feats:
+        yield head + sep + "    " + json.dumps(f, indent=2).replace("\n", "\n    ")
+        head, sep = "", ",\n"
+    yield (head + "]\n}") if head else "\n  ]\n}"
+
+
+def write_geojson(records, out, *, compact: bool = True, seq: bool = False) -> int:
+    """Stream iter_geojson into anything with a text .write(). Returns features written."""
+    n = 0
+
+    def counted():
+        nonlocal n
+        for f in filter(None, map(_feature, records)):
+            n += 1
+            yield f
+
+    for chunk in _geojson_chunks(counted(), compact, seq):
+        out.write(chunk)
+    return n
 
 
 # ── the return leg: one envelope, one parser, no model call ─────────────────────
@@ -380,8 +1418,24 @@ def parse_envelope(text: str) -> str:
     return json.dumps({"ok": not errors, "rows": rows, "errors": errors})
 
 
+def sample_pipeline(n: int = 6, *, decode: str = "once", draft: bool = False, resize=None) -> str:
+    """process_photo over sample_photos(n), one at a time: photos/s and per-stage ms
+    percentiles (ingest_summary). Making the samples is not timed."""
+    photos = sample_photos(n)
+    t0 = time.perf_counter()
+    reports = [json.loads(process_photo(nm, b, decode=decode, draft=draft, resize=resize))
+               for nm, b in photos]
+    return json.dumps({"decode": decode, "draft": draft, "resize": resize,
+                       **ingest_summary(reports, time.perf_counter() - t0, 1)})
+
+
+# What the native bench (scripts/workshop_bench.py) runs: (function, args, kwargs).
+BENCH = [("sample_pipeline", (), {"decode": "per-stage"}), ("sample_pipeline", (), {}),
+         ("sample_pipeline", (), {"draft": True}), ("resize_bench", (), {"n": 2}),
+         ("price_table", ([(4032, 3024), (3024, 4032), (1920, 1080)],), {})]
+
+
 def versions() -> str:
-    import sys
     import PIL
     return json.dumps({"python": sys.version.split()[0], "pillow": PIL.__version__,
                        "pillow_heif": HEIF, "core": __version__})
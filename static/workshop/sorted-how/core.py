@@ -152,6 +152,11 @@ def persistent(n=100_000, k=1000, budget_ms=150):
                        "pvector.append x n": _timed(pv_append, B), "list.append x n": _timed(list_append, B),
                        "impl": "C extension (pvectorc)" if "pvectorc" in impl else "pure Python (pyrsistent._pvector)"})
 
+# What the native bench (scripts/workshop_bench.py) runs: (function, args, kwargs), the
+# page's own defaults. A budget_ms kwarg is the runner's to override.
+BENCH = [("race", (100_000,), {"budget_ms": 150}), ("ops", (100_000, 10_000), {"budget_ms": 120}),
+         ("functional", (100_000,), {"budget_ms": 150}), ("persistent", (100_000, 1000), {"budget_ms": 150})]
+
 def versions():
     import sortedcontainers, toolz, cytoolz, pyrsistent
     try: